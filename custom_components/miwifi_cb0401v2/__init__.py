@@ -1,35 +1,133 @@
+from __future__ import annotations
+
 import logging
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from .api import MiWiFiClient
-from .const import DOMAIN
+from datetime import timedelta
+from typing import TYPE_CHECKING
+from .api import MiWiFiClient, create_session
+from .const import (
+    CONF_INTERVAL, CONF_SENSOR_GROUPS, CONF_SIGNAL_SAMPLE_INTERVAL, CONF_SIGNAL_WINDOW, CONF_TIMEOUT,
+    DATA_FLEET, DEFAULT_SIGNAL_SAMPLE_INTERVAL, DEFAULT_SIGNAL_WINDOW, DEFAULT_TIMEOUT, DOMAIN, ENDPOINT_TTLS,
+    FLEET_MAX_CONCURRENT_REQUESTS, REFRESH_TRIGGERS, SENSOR_GROUPS, STORAGE_VERSION, TRIGGER_SOURCE_MAX_AGE,
+)
+from .fleet import Fleet
+
+# Imported here rather than in async_setup_entry, so Home Assistant imports them in its executor
+# together with the integration. Without Home Assistant the modules that don't need it (api,
+# cache, extract, exporter, ...) still import as part of this package.
+try:
+    from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+    from homeassistant.exceptions import ConfigEntryNotReady
+    from homeassistant.helpers.storage import Store
+    from .coordinator import MiWiFiCoordinator
+except ImportError:
+    MiWiFiCoordinator = None
+
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
 
 _LOGGER = logging.getLogger(__name__)
 
+PLATFORMS = ["sensor", "device_tracker"]
+
+def _store(hass: HomeAssistant, entry: ConfigEntry):
+    """Storage for the last known device information and payloads of a config entry."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+
+def _endpoint_ttls(options):
+    """Refresh interval of every endpoint read by an enabled sensor group or needed as trigger source."""
+    groups = options.get(CONF_SENSOR_GROUPS, list(SENSOR_GROUPS))
+    endpoints = {SENSOR_GROUPS[group] for group in groups if group in SENSOR_GROUPS}
+    ttls = {
+        endpoint: timedelta(seconds=options.get(CONF_INTERVAL.format(endpoint), ttl.total_seconds()))
+        for endpoint, ttl in ENDPOINT_TTLS.items()
+        if endpoint in endpoints
+    }
+    # A target fetched early by a trigger is only as fresh as the trigger's source
+    for source, _, target in REFRESH_TRIGGERS:
+        max_age = TRIGGER_SOURCE_MAX_AGE.get(source)
+        if target in ttls and max_age is not None:
+            ttls[source] = min(ttls.get(source, max_age), max_age)
+    return ttls
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up the integration from a config entry."""
     client = MiWiFiClient(
         host=entry.data["host"],
         username=entry.data["username"],
         password=entry.data["password"],
-        session=async_get_clientsession(hass)
+        session=create_session(timeout=entry.options.get(CONF_TIMEOUT, DEFAULT_TIMEOUT))
     )
-    await client.login()  # Log in and fetch token
+    store = _store(hass, entry)
+    stored = await store.async_load() or {}
+    client.mac_address = stored.get("mac_address")
+    client.firmware_version = stored.get("firmware_version")
 
+    # The MAC address identifies the device, so only the very first start has to wait for the router.
+    # Afterwards the entities are set up from the last run's data and the login happens in the background.
+    logged_in = False
     if not client.mac_address:
-        _LOGGER.error("MAC address not found. Device will not be properly registered.")
-        return False
+        try:
+            logged_in = await client.login()  # Log in and fetch token
+        except Exception:
+            await client.close()
+            raise
+        if not client.mac_address:
+            await client.close()
+            if not logged_in:
+                raise ConfigEntryNotReady(f"Router {entry.data['host']} is not reachable")
+            _LOGGER.error("MAC address not found. Device will not be properly registered.")
+            return False
+
+    # Config entries aren't unloaded at shutdown, so close the session explicitly then
+    async def _async_close_client(event):
+        await client.close()
+
+    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close_client))
+
+    # All routers share one fleet: a global request cap and staggered poll phases
+    fleet = hass.data.get(DATA_FLEET)
+    if fleet is None:
+        fleet = hass.data[DATA_FLEET] = Fleet(FLEET_MAX_CONCURRENT_REQUESTS)
+    fleet.join(entry.entry_id)
+
+    # One coordinator per router fetches every endpoint once per interval for all entities
+    ttls = _endpoint_ttls(entry.options)
+    coordinator = MiWiFiCoordinator(hass, client, store, ttls=ttls, fleet=fleet, fleet_key=entry.entry_id)
+    coordinator.restore(stored.get("payloads"))
+    coordinator.sms_inbox.last_id = stored.get("sms_last_id")
+    sample_interval = entry.options.get(CONF_SIGNAL_SAMPLE_INTERVAL, DEFAULT_SIGNAL_SAMPLE_INTERVAL)
+    if sample_interval and "cpe_detect" in ttls:
+        entry.async_on_unload(coordinator.enable_signal_stats(
+            sample_interval, entry.options.get(CONF_SIGNAL_WINDOW, DEFAULT_SIGNAL_WINDOW)
+        ))
 
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = client
+    hass.data[DOMAIN][entry.entry_id] = coordinator
 
-    await hass.config_entries.async_forward_entry_setups(entry, ["sensor"])
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
+    entry.async_create_background_task(
+        hass, coordinator.async_start(login=not logged_in), f"{DOMAIN} start {entry.entry_id}"
+    )
     return True
 
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry):
+    """Set the entry up again, so changed sensor groups and intervals take effect."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload a config entry."""
-    unload_ok = await hass.config_entries.async_forward_entry_unload(entry, "sensor")
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.client.close()
+        fleet = hass.data[DATA_FLEET]
+        fleet.leave(entry.entry_id)
+        if not len(fleet):
+            hass.data.pop(DATA_FLEET)
     return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Remove the data saved for a deleted config entry."""
+    await _store(hass, entry).async_remove()
@@ -1,10 +1,50 @@
 import aiohttp
+import asyncio
+import functools
 import json
 import ssl
 import logging
+import time
+from .const import CONNECTION_LIMIT_PER_HOST, DEFAULT_TIMEOUT, KEEPALIVE_TIMEOUT
+from .stats import ClientStats
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 _LOGGER = logging.getLogger(__name__)
 
+# "code" of the router's JSON answer to a request with an invalid or expired token
+INVALID_TOKEN_CODE = 401
+
+class MiWiFiConnectionError(Exception):
+    """The router could not be reached or did not answer in time."""
+
+@functools.lru_cache(maxsize=1)
+def _insecure_ssl_context():
+    """SSL context for the router's self-signed certificate, built once for all sessions."""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+def create_session(timeout=DEFAULT_TIMEOUT, limit_per_host=CONNECTION_LIMIT_PER_HOST):
+    """Create an HTTP session with its own keep-alive connection pool for one router.
+
+    TLS handshakes are expensive on the router's CPU, so connections are kept open between polls.
+    """
+    connector = aiohttp.TCPConnector(
+        ssl=_insecure_ssl_context(),
+        limit_per_host=limit_per_host,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    )
+
 class MiWiFiClient:
     def __init__(self, host, username, password, session):
         self._host = host
@@ -12,10 +52,32 @@ class MiWiFiClient:
         self._password = password
         self._session = session
         self._token = None
+        self._login_lock = asyncio.Lock()
+        self._login_error = None  # MiWiFiConnectionError of the last re-login, if it failed that way
         self.mac_address = None
         self.firmware_version = None 
+        self.initial_payloads = {}  # Endpoint payloads already fetched during login
+        self.stats = ClientStats()
+
+    async def close(self):
+        """Close the HTTP session and its pooled connections."""
+        await self._session.close()
 
     async def login(self):
+        """Authenticate and fetch the initial device information."""
+        try:
+            # Through the login lock, so requests started meanwhile wait for this login instead of
+            # logging in a second time
+            if not await self._relogin(None, initial=True):
+                return False
+            # Both only need the token, so they don't have to wait for each other
+            await asyncio.gather(self.fetch_mac_address(), self.fetch_init_info())  # Hole Firmware-Version und andere Initialdaten
+        except MiWiFiConnectionError as e:
+            _LOGGER.error(f"Error while logging in and fetching initial device information: {e}")
+            return False
+        return True
+
+    async def _authenticate(self):
         """Authenticate and getting token."""
         url = f"https://{self._host}/cgi-bin/luci/api/xqsystem/login"
         data = {
@@ -28,21 +90,14 @@ class MiWiFiClient:
             "Accept": "application/json",
             "User-Agent": "Mozilla/5.0"
         }
-        ssl_context = False  # SSL-Prüfung deaktiviert
-
         try:
-            async with self._session.post(url, data=data, headers=headers, ssl=ssl_context) as response:
-                text = await response.text()
+            async with self._session.post(url, data=data, headers=headers) as response:
+                body = await response.read()
                 if response.status == 200:
-                    try:
-                        result = await response.json()
-                    except aiohttp.ContentTypeError:
-                        result = json.loads(text)
+                    result = _json_loads(body)
                     if result.get("token"):
                         self._token = result.get("token")
                         _LOGGER.debug(f"Requested Token: {self._token}")
-                        await self.fetch_mac_address()
-                        await self.fetch_init_info()  # Hole Firmware-Version und andere Initialdaten
                         return True
                     else:
                         _LOGGER.error(f"Login error: {result.get('msg')}")
@@ -50,31 +105,27 @@ class MiWiFiClient:
                 else:
                     _LOGGER.error(f"Login error: {response.status}")
                     return False
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Raised like in _get_api, so callers can tell an unreachable router from rejected credentials
+            raise MiWiFiConnectionError(f"Error while login: {e!r}") from e
         except Exception as e:
             _LOGGER.error(f"Unknown error while login: {e}")
             return False
 
     async def fetch_mac_address(self):
         """Method for requesting MAC-address."""
-        url = f"https://{self._host}/cgi-bin/luci/;stok={self._token}/api/xqdtcustom/newstatus"
-        headers = {"Accept": "application/json", "User-Agent": "Mozilla/5.0"}
-        ssl_context = False
-        
-        try:
-            async with self._session.get(url, headers=headers, ssl=ssl_context) as response:
-                if response.status == 200:
-                    text = await response.text()
-                    data = json.loads(text)
-                    hardware_info = data.get("hardware")
-                    if hardware_info:
-                        self.mac_address = hardware_info.get("mac")
-                        _LOGGER.debug(f"Successfully requested MAC-address: {self.mac_address}")
-                    else:
-                        _LOGGER.warning("MAC-Adresse could'nt found in the JSON answer.")
-                else:
-                    _LOGGER.error(f"Error while requesting MAC-address. Statuscode: {response.status}")
-        except Exception as e:
-            _LOGGER.error(f"Error while requesting MAC-address: {e}")
+        data = await self.newstatus()
+        if data is None:
+            _LOGGER.error("Error while requesting MAC-address.")
+            return
+        # Keep the payload so the first refresh doesn't request and parse newstatus again
+        self.initial_payloads["newstatus"] = data
+        hardware_info = data.get("hardware")
+        if hardware_info:
+            self.mac_address = hardware_info.get("mac")
+            _LOGGER.debug(f"Successfully requested MAC-address: {self.mac_address}")
+        else:
+            _LOGGER.warning("MAC-Adresse could'nt found in the JSON answer.")
 
     async def fetch_init_info(self):
         """Getting initial informations"""
@@ -103,29 +154,83 @@ class MiWiFiClient:
         """Choose get_msgbox_count api endpoint"""
         return await self._get_api("xqmobile/get_msgbox_count")
 
-    async def _get_api(self, endpoint):
+    async def msgbox_list(self):
+        """Choose get_msgbox_list api endpoint, the SMS inbox"""
+        return await self._get_api("xqmobile/get_msgbox_list")
+
+    async def _relogin(self, stale_token, initial=False):
+        """Renew the session token once, no matter how many callers noticed it expired.
+
+        With stale_token None this is the first login, shared with everyone who needs a token.
+        """
+        in_flight = self._login_lock.locked()
+        async with self._login_lock:
+            if in_flight or self._token != stale_token:
+                # Another caller logged in again while we were waiting for the lock; share its
+                # result instead of trying again, also when it failed
+                if self._token is None and self._login_error is not None:
+                    raise MiWiFiConnectionError(str(self._login_error))
+                return self._token is not None
+            self._login_error = None
+            self._token = None
+            if not initial:
+                self.stats.relogins += 1
+            try:
+                return await self._authenticate()
+            except MiWiFiConnectionError as e:
+                self._login_error = e
+                raise
+
+    async def _get_api(self, endpoint, retry=True):
         """Helper for API requests"""
-        if not self._token:
+        if not self._token and not await self._relogin(None):
             _LOGGER.error("Nicht authentifiziert. Bitte zuerst einloggen.")
             return None
 
-        url = f"https://{self._host}/cgi-bin/luci/;stok={self._token}/api/{endpoint}"
+        token = self._token
+        url = f"https://{self._host}/cgi-bin/luci/;stok={token}/api/{endpoint}"
         headers = {"Accept": "application/json", "User-Agent": "Mozilla/5.0"}
-        ssl_context = False
-
+        stats = self.stats.endpoint(endpoint)
         try:
-            async with self._session.get(url, headers=headers, ssl=ssl_context) as response:
-                text = await response.text()
+            start = time.perf_counter()
+            # Don't follow redirects: an expired stok is answered with a redirect to the login page
+            async with self._session.get(url, headers=headers, allow_redirects=False) as response:
+                body = await response.read()
+                received = time.perf_counter()
                 if response.status == 200:
                     try:
-                        result = await response.json()
-                    except aiohttp.ContentTypeError:
-                        result = json.loads(text)
-                    return result
+                        result = _json_loads(body)
+                    except ValueError:
+                        result = None  # The login page was served instead of JSON
+                    expired = not isinstance(result, dict) or result.get("code") == INVALID_TOKEN_CODE
+                    valid = not expired and result.get("code", 0) == 0
+                    stats.record(received - start, len(body), time.perf_counter() - received, ok=valid)
+                    if valid:
+                        return result
+                    if not expired:
+                        # A real error of the endpoint, e.g. no SIM card; logging in again won't help
+                        _LOGGER.debug(f"Error answer from {endpoint}: {result}")
+                        return None
                 else:
-                    _LOGGER.error(f"Error while request {endpoint}. Statuscode: {response.status}")
-                    _LOGGER.debug(f"Answer: {text}")
-                    return None
+                    stats.record(received - start, len(body), 0.0, ok=False)
+                    if response.status != 401 and not 300 <= response.status < 400:
+                        _LOGGER.error(f"Error while request {endpoint}. Statuscode: {response.status}")
+                        if _LOGGER.isEnabledFor(logging.DEBUG):
+                            _LOGGER.debug(f"Answer: {body.decode(errors='replace')}")
+                        return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            stats.record_failure()
+            # Raised instead of logged, the caller decides how to back off
+            raise MiWiFiConnectionError(f"Error while request {endpoint}: {e!r}") from e
         except Exception as e:
             _LOGGER.error(f"Error while request {endpoint}: {e}")
             return None
+
+        # The router rejected the token, e.g. because the session expired or it rebooted
+        if not retry:
+            _LOGGER.error(f"Session still invalid after logging in again, request {endpoint} failed")
+            return None
+        _LOGGER.info(f"Session expired while requesting {endpoint}, logging in again")
+        if not await self._relogin(token):
+            return None
+        return await self._get_api(endpoint, retry=False)
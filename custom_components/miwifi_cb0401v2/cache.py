@@ -0,0 +1,171 @@
+import asyncio
+import contextlib
+import logging
+import random
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+# Refresh ticks are scheduled with a little jitter, so an entry that is due "now" must not be
+# treated as fresh because of a few milliseconds.
+_TTL_SLACK = 0.5
+
+class CacheEntry:
+    """Cached payload of one endpoint together with its freshness information."""
+
+    __slots__ = ("data", "updated", "ttl", "task")
+
+    def __init__(self, ttl):
+        self.data = None
+        self.updated = None  # time.monotonic() of the last successful fetch
+        self.ttl = ttl
+        self.task = None  # Fetch currently in flight, shared by all readers of this endpoint
+
+    def is_fresh(self, now, max_age=None):
+        """Return True if the cached payload is still within its TTL, or max_age seconds if given."""
+        max_age = self.ttl if max_age is None else max_age
+        return bool(self.data) and self.updated is not None and now - self.updated < max_age - _TTL_SLACK
+
+    @property
+    def in_flight(self):
+        return self.task is not None
+
+class DataCache:
+    """Cache for data from different API endpoints, each with its own refresh interval."""
+
+    def __init__(self, client, ttls, max_concurrency=None, shared_slot=None):
+        """ttls maps the endpoint name (a MiWiFiClient method) to its refresh interval.
+
+        max_concurrency optionally caps the number of requests sent to the router at once.
+        shared_slot optionally returns an async context manager that is held during every request
+        as well, e.g. a slot shared with the caches of other routers.
+        """
+        self._client = client
+        self._entries = {endpoint: CacheEntry(ttl.total_seconds()) for endpoint, ttl in ttls.items()}
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self._shared_slot = shared_slot
+        # Per endpoint: served from the cache, fetched, or joined a fetch already in flight
+        self.hits = dict.fromkeys(self._entries, 0)
+        self.misses = dict.fromkeys(self._entries, 0)
+        self.coalesced = dict.fromkeys(self._entries, 0)
+
+    @property
+    def endpoints(self):
+        return tuple(self._entries)
+
+    def stats(self):
+        """Cache statistics and payload age per endpoint, for diagnostics."""
+        now = time.monotonic()
+        return {
+            endpoint: {
+                "hits": self.hits[endpoint],
+                "misses": self.misses[endpoint],
+                "coalesced": self.coalesced[endpoint],
+                "ttl": entry.ttl,
+                "age": round(now - entry.updated, 1) if entry.updated is not None else None,
+                "in_flight": entry.in_flight,
+            }
+            for endpoint, entry in self._entries.items()
+        }
+
+    def fetched_at(self, endpoint):
+        """time.monotonic() of the last successful fetch of the endpoint, or None."""
+        entry = self._entries.get(endpoint)
+        return entry.updated if entry is not None else None
+
+    def invalidate(self, endpoint):
+        """Make the next read fetch the endpoint again; the old payload stays as fallback."""
+        entry = self._entries.get(endpoint)
+        if entry is not None:
+            entry.updated = None
+
+    def prime(self, endpoint, data):
+        """Store a payload that was fetched elsewhere as if the cache had just fetched it."""
+        entry = self._entries.get(endpoint)
+        if entry is not None and data:
+            entry.data = data
+            entry.updated = time.monotonic()
+
+    async def get_data(self, endpoint, max_age=None):
+        """Get cached data for a specified endpoint or update it if its TTL (or max_age) expired."""
+        data, _ = await self._read(endpoint, max_age)
+        return data
+
+    async def _read(self, endpoint, max_age=None):
+        """Return (payload, True if it was requested from the router in this call)."""
+        entry = self._entries[endpoint]
+        if entry.is_fresh(time.monotonic(), max_age):
+            self.hits[endpoint] += 1
+            return entry.data, False
+        if entry.task is None:
+            self.misses[endpoint] += 1
+            entry.task = asyncio.ensure_future(self._fetch(endpoint, entry))
+        else:
+            self.coalesced[endpoint] += 1
+        # Concurrent readers share the in-flight request. Shield it so that a cancelled reader
+        # does not abort the fetch for everybody else.
+        return await asyncio.shield(entry.task), True
+
+    async def refresh(self, endpoints=None):
+        """Fetch all stale endpoints concurrently and return the payloads keyed by endpoint."""
+        endpoints = self.endpoints if endpoints is None else tuple(endpoints)
+        results = await asyncio.gather(*(self._read(endpoint) for endpoint in endpoints), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        # Only requests made in this refresh tell whether the router answers; payloads served from
+        # the cache would hide an outage until their TTL runs out
+        if errors and not any(not isinstance(result, BaseException) and result[1] for result in results):
+            # Every request failed, most likely the router is unreachable
+            raise errors[0]
+        data = {}
+        for endpoint, result in zip(endpoints, results):
+            if isinstance(result, BaseException):
+                _LOGGER.debug(f"Keeping previous {endpoint} data after error: {result}")
+                data[endpoint] = self._entries[endpoint].data
+            else:
+                data[endpoint] = result[0]
+        return data
+
+    async def _fetch(self, endpoint, entry):
+        """Request one endpoint from the router, respecting the concurrency cap."""
+        try:
+            async with self.request_slot():
+                data = await getattr(self._client, endpoint)()
+            entry.data = data
+            entry.updated = time.monotonic()
+            return data
+        finally:
+            entry.task = None
+
+    @contextlib.asynccontextmanager
+    async def request_slot(self):
+        """Wait until this router's cap and the shared slot, if any, allow one more request.
+
+        Also for requests made outside the cache, so they count against the same limits.
+        """
+        async with contextlib.AsyncExitStack() as stack:
+            if self._semaphore is not None:
+                await stack.enter_async_context(self._semaphore)
+            if self._shared_slot is not None:
+                await stack.enter_async_context(self._shared_slot())
+            yield
+
+class Backoff:
+    """Exponential backoff with jitter for consecutive failed refreshes."""
+
+    def __init__(self, interval, max_interval, factor=2):
+        self._interval = interval.total_seconds()
+        self._max_interval = max_interval.total_seconds()
+        self._factor = factor
+        self.failures = 0
+
+    def success(self):
+        """Reset after a successful refresh and return the normal interval in seconds."""
+        self.failures = 0
+        return self._interval
+
+    def failure(self):
+        """Count a failed refresh and return the seconds to wait before the next attempt."""
+        self.failures += 1
+        delay = min(self._max_interval, self._interval * self._factor ** self.failures)
+        # Randomise the second half so routers that failed together don't retry in lockstep
+        return delay / 2 + random.uniform(0, delay / 2)
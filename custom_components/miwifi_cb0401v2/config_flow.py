@@ -2,12 +2,16 @@ import logging
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
+import homeassistant.helpers.config_validation as cv
 
-from .api import MiWiFiClient
-from .const import DOMAIN, DEFAULT_HOST, DEFAULT_USERNAME
+from .api import MiWiFiClient, create_session
+from .const import (
+    DOMAIN, DEFAULT_HOST, DEFAULT_USERNAME, CONF_INTERVAL, CONF_SENSOR_GROUPS, CONF_SIGNAL_SAMPLE_INTERVAL,
+    CONF_SIGNAL_WINDOW, CONF_TIMEOUT, DEFAULT_SIGNAL_SAMPLE_INTERVAL, DEFAULT_SIGNAL_WINDOW, DEFAULT_TIMEOUT,
+    ENDPOINT_TTLS, SENSOR_GROUPS,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -17,6 +21,15 @@ CONFIG_SCHEMA = vol.Schema({
     vol.Required("password"): str,
 })
 
+# Labels of the sensor groups in the options form
+SENSOR_GROUP_LABELS = {
+    "general": "Mobile network, signal and data usage (cpe_detect)",
+    "specific": "IP addresses and DNS servers (cpe_detect)",
+    "newstatus": "Hardware and Wi-Fi (newstatus)",
+    "devicelist": "Connected devices and device trackers (devicelist)",
+    "msgbox": "SMS messages (msgbox_count)",
+}
+
 class MiWiFiFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     """Config flow for MiWiFi CB0401V2 integration."""
 
@@ -33,10 +46,13 @@ class MiWiFiFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             password = user_input["password"]
 
             # Create a client instance and attempt login
-            session = async_get_clientsession(self.hass)
-            client = MiWiFiClient(host, username, password, session)
+            client = MiWiFiClient(host, username, password, create_session())
+            try:
+                logged_in = await client.login()
+            finally:
+                await client.close()
 
-            if await client.login():
+            if logged_in:
                 # Save the configuration in Home Assistant if login is successful
                 user_input["username"] = username  # Add default username to config
                 return self.async_create_entry(title="MiWiFi Router", data=user_input)
@@ -49,3 +65,38 @@ class MiWiFiFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_import(self, import_config):
         """Handle import from configuration.yaml."""
         return await self.async_step_user(user_input=import_config)
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Return the options flow for this handler."""
+        return MiWiFiOptionsFlowHandler(config_entry)
+
+class MiWiFiOptionsFlowHandler(config_entries.OptionsFlow):
+    """Options flow to choose the sensor groups and how often each endpoint is polled."""
+
+    def __init__(self, config_entry):
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input=None) -> FlowResult:
+        """Show and save the options; the entry is reloaded with them afterwards."""
+        errors = {}
+
+        if user_input is not None:
+            if user_input[CONF_SENSOR_GROUPS]:
+                return self.async_create_entry(title="", data=user_input)
+            errors[CONF_SENSOR_GROUPS] = "no_sensor_groups"
+
+        options = self._entry.options
+        schema = {
+            vol.Required(CONF_SENSOR_GROUPS, default=options.get(CONF_SENSOR_GROUPS, list(SENSOR_GROUPS))): cv.multi_select(SENSOR_GROUP_LABELS),
+        }
+        for endpoint, ttl in ENDPOINT_TTLS.items():
+            key = CONF_INTERVAL.format(endpoint)
+            schema[vol.Required(key, default=options.get(key, int(ttl.total_seconds())))] = vol.All(vol.Coerce(int), vol.Range(min=5))
+        schema.update({
+            vol.Required(CONF_TIMEOUT, default=options.get(CONF_TIMEOUT, DEFAULT_TIMEOUT)): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
+            vol.Required(CONF_SIGNAL_SAMPLE_INTERVAL, default=options.get(CONF_SIGNAL_SAMPLE_INTERVAL, DEFAULT_SIGNAL_SAMPLE_INTERVAL)): vol.All(vol.Coerce(int), vol.Range(min=0)),
+            vol.Required(CONF_SIGNAL_WINDOW, default=options.get(CONF_SIGNAL_WINDOW, DEFAULT_SIGNAL_WINDOW)): vol.All(vol.Coerce(int), vol.Range(min=60)),
+        })
+        return self.async_show_form(step_id="init", data_schema=vol.Schema(schema), errors=errors)
@@ -1,5 +1,7 @@
 # const.py
 
+from datetime import timedelta
+
 DOMAIN = "miwifi_cb0401v2"
 DEFAULT_HOST = "192.168.31.1"
 DEFAULT_USERNAME = "admin"
@@ -21,3 +23,83 @@ ICON_NETWORK = "mdi:network"
 ICON_OPERATOR = "mdi:cellphone"
 ICON_SIGNAL = "mdi:signal"
 ICON_SIGNAL_VARIANT = "mdi:signal-variant"
+
+# Polling: maximum age per API endpoint, keyed by the name used in the sensor definitions.
+# Radio metrics change quickly. The small newstatus payload doubles as indicator for the heavy
+# devicelist, which is fetched early when REFRESH_TRIGGERS say so.
+ENDPOINT_TTLS = {
+    "cpe_detect": timedelta(seconds=30),
+    "newstatus": timedelta(minutes=1),
+    "devicelist": timedelta(minutes=10),
+    "msgbox_count": timedelta(minutes=1),
+}
+ENDPOINTS = tuple(ENDPOINT_TTLS)
+
+# (source endpoint, indicator paths, target endpoint): the target is refetched in the same refresh
+# as soon as one of the indicators in the source payload changes
+REFRESH_TRIGGERS = (
+    # Clients joined or left
+    ("newstatus", ("2g.online_sta_count", "5g.online_sta_count", "count"), "devicelist"),
+    # The mobile connection was re-established
+    ("cpe_detect", ("net.info.linktype", "net.ipv4info.ipv4"), "newstatus"),
+)
+# Maximum age of a trigger source while one of its targets is polled, even if no enabled sensor
+# group reads the source or its interval is set longer: e.g. the devicelist's long maximum age is
+# only safe because newstatus notices clients joining or leaving within a minute
+TRIGGER_SOURCE_MAX_AGE = {
+    "newstatus": timedelta(minutes=1),
+}
+
+# Options: the sensor groups to create and the endpoint each of them reads. Endpoints that no
+# enabled group reads are not polled at all.
+CONF_SENSOR_GROUPS = "sensor_groups"
+SENSOR_GROUPS = {
+    "general": "cpe_detect",
+    "specific": "cpe_detect",
+    "newstatus": "newstatus",
+    "devicelist": "devicelist",
+    "msgbox": "msgbox_count",
+}
+CONF_INTERVAL = "{}_interval"  # Option key of an endpoint's refresh interval in seconds
+
+# Throughput derived from the cumulative data usage counter: the rate is averaged over
+# TRAFFIC_RATE_SPAN, the usage sensor covers TRAFFIC_WINDOW
+TRAFFIC_RATE_SPAN = timedelta(minutes=5)
+TRAFFIC_WINDOW = timedelta(hours=1)
+
+# Fast signal sampling: cpe_detect is sampled every CONF_SIGNAL_SAMPLE_INTERVAL seconds (0 = off)
+# and only min/mean/max/p5 of each metric are published, once per CONF_SIGNAL_WINDOW seconds
+CONF_SIGNAL_SAMPLE_INTERVAL = "signal_sample_interval"
+DEFAULT_SIGNAL_SAMPLE_INTERVAL = 0
+CONF_SIGNAL_WINDOW = "signal_window"
+DEFAULT_SIGNAL_WINDOW = 300
+SIGNAL_METRICS = ("rsrp", "rsrq", "snr", "rsrp_5g", "rsrq_5g", "snr_5g")  # keys in net.info
+
+# Fired once per new SMS; the inbox is only fetched when msgbox_count changes
+EVENT_SMS_RECEIVED = f"{DOMAIN}_sms_received"
+
+# Last known device information and payloads, restored on startup
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 120  # seconds, changes in between are written together
+# Changes of these payloads or of the device information are saved right away. The others (radio
+# values, client speeds) change on every poll and are saved at most once per STORAGE_MAX_AGE.
+STORAGE_TRIGGER_ENDPOINTS = frozenset({"newstatus", "msgbox_count"})
+STORAGE_MAX_AGE = timedelta(hours=1)
+
+# Longest wait between retries while the router is unreachable
+BACKOFF_MAX_INTERVAL = timedelta(minutes=10)
+
+# Maximum number of requests sent to one router at the same time
+MAX_CONCURRENT_REQUESTS = 4
+
+# Maximum number of requests in flight to all routers together, handed out fairly between them.
+# A router that doesn't answer may only use one of them until it answers again.
+FLEET_MAX_CONCURRENT_REQUESTS = 8
+DATA_FLEET = f"{DOMAIN}_fleet"  # hass.data key of the Fleet shared by all config entries
+
+# HTTP connection pool per router. Keep-alive outlasts the polling interval so the
+# TLS connection is reused instead of renegotiated on every poll.
+CONF_TIMEOUT = "timeout"
+DEFAULT_TIMEOUT = 10  # seconds per request
+CONNECTION_LIMIT_PER_HOST = MAX_CONCURRENT_REQUESTS
+KEEPALIVE_TIMEOUT = 60  # seconds
@@ -0,0 +1,256 @@
+import asyncio
+import functools
+import logging
+import time
+from datetime import timedelta
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from .api import MiWiFiConnectionError
+from .cache import Backoff, DataCache
+from .const import (
+    BACKOFF_MAX_INTERVAL, ENDPOINT_TTLS, EVENT_SMS_RECEIVED, MAX_CONCURRENT_REQUESTS, REFRESH_TRIGGERS,
+    SIGNAL_METRICS, STORAGE_MAX_AGE, STORAGE_SAVE_DELAY, STORAGE_TRIGGER_ENDPOINTS, TRAFFIC_RATE_SPAN,
+    TRAFFIC_WINDOW,
+)
+from .derived import CounterRate, SampleWindow
+from .device_index import NO_CHANGES, DeviceIndex
+from .planner import RefreshPlanner
+from .sms import SmsInbox
+
+_LOGGER = logging.getLogger(__name__)
+
+class MiWiFiCoordinator(DataUpdateCoordinator):
+    """Poll all API endpoints of one router and push the results to its entities."""
+
+    def __init__(self, hass: HomeAssistant, client, store=None, ttls=ENDPOINT_TTLS, fleet=None, fleet_key=None):
+        # Tick as often as the fastest endpoint needs; the cache skips endpoints that are still fresh
+        interval = min(ttls.values())
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"MiWiFi {client._host}",
+            update_interval=interval,
+            # Don't notify the entities at all when no payload changed
+            always_update=False,
+        )
+        self.client = client
+        self._store = store
+        self._stored_payloads = {}  # Last good payload per endpoint, as written to the store
+        self._saved_identity = None  # MAC, firmware and SMS watermark of the last save
+        self._saved_at = None  # time.monotonic() of the last save
+        self.changed_endpoints = frozenset()  # Endpoints whose payload changed in the last refresh
+        self.backoff = Backoff(interval, BACKOFF_MAX_INTERVAL)
+        self.last_refresh_duration = None  # seconds the last successful refresh took
+        self.device_index = DeviceIndex()  # Clients of the devicelist endpoint keyed by MAC
+        self.device_diff = NO_CHANGES  # Clients that joined, left or changed in the last refresh
+        # In a fleet, every request also needs one of the slots shared by all routers
+        self._fleet = fleet
+        self._fleet_key = fleet_key
+        shared_slot = functools.partial(fleet.limiter.slot, fleet_key) if fleet is not None else None
+        self.data_cache = DataCache(client, ttls, max_concurrency=MAX_CONCURRENT_REQUESTS, shared_slot=shared_slot)
+        # Heavy endpoints are fetched early when a cheap indicator changes, otherwise at their TTL
+        self.planner = RefreshPlanner(REFRESH_TRIGGERS)
+        # One data usage sample per cpe_detect fetch, enough of them to cover the window
+        self.traffic = CounterRate(
+            TRAFFIC_WINDOW.total_seconds(),
+            int(TRAFFIC_WINDOW / ttls.get("cpe_detect", interval)) + 2,
+        )
+        self._traffic_sampled_at = None
+        self.signal_stats = None  # SampleWindow per signal metric while fast sampling is enabled
+        self._signal_interval = None
+        self._signal_window = None
+        self._signal_sampled_at = None
+        self._signal_published_at = None
+        self._signal_payload = None
+        self._started = False  # The first refresh of async_start is done
+        self.sms_inbox = SmsInbox()  # Watermark of the SMS already reported as events
+        self._sms_pending = False  # msgbox_count changed, but the inbox wasn't fetched yet
+
+    def restore(self, payloads):
+        """Show the payloads saved by the previous run until the first refresh replaces them."""
+        if payloads:
+            self._stored_payloads = dict(payloads)
+            self.data = payloads
+            self.changed_endpoints = frozenset(payloads)
+            self._update_device_index(payloads)
+
+    def enable_signal_stats(self, interval, window):
+        """Sample the signal metrics every interval seconds and publish their statistics once per window.
+
+        Returns the function that stops the sampling.
+        """
+        self._signal_interval = interval
+        self._signal_window = window
+        self._signal_published_at = time.monotonic()
+        self._signal_payload = (self.data or {}).get("signal")
+        capacity = max(1, round(window / interval))
+        self.signal_stats = {metric: SampleWindow(capacity) for metric in SIGNAL_METRICS}
+        return async_track_time_interval(self.hass, self._async_sample_signal, timedelta(seconds=interval))
+
+    async def async_start(self, login=True):
+        """Log in and fetch the first data in the background, so startup doesn't wait for the router."""
+        if self._fleet is not None and self.data is not None:
+            # The entities already show the restored data, so this router can wait for its turn.
+            # Later refreshes keep the offset, which spreads the polls of the fleet over the interval.
+            await asyncio.sleep(self._fleet.phase(self._fleet_key, self.update_interval.total_seconds()))
+        if login:
+            await self.client.login()
+        for endpoint, data in self.client.initial_payloads.items():
+            self.data_cache.prime(endpoint, data)
+        await self.async_refresh()
+        self._started = True
+
+    async def _async_update_data(self):
+        """Return the payloads of all endpoints keyed by endpoint, refreshing the stale ones concurrently."""
+        self.device_diff = NO_CHANGES
+        start = time.perf_counter()
+        try:
+            data = await self._async_fetch()
+        except MiWiFiConnectionError as err:
+            # Poll less often while the router is down; all entities become unavailable together
+            delay = self.backoff.failure()
+            if self._fleet is not None:
+                # Its requests only wait for timeouts, leave the shared slots to the other routers
+                self._fleet.limiter.restrict(self._fleet_key, 1)
+            self.update_interval = timedelta(seconds=delay)
+            raise UpdateFailed(f"{err}, retrying in {delay:.0f} s") from err
+        self.last_refresh_duration = time.perf_counter() - start
+        if self.backoff.failures:
+            self.update_interval = timedelta(seconds=self.backoff.success())
+            if self._fleet is not None:
+                self._fleet.limiter.restrict(self._fleet_key, None)
+        # Derived values are published like another endpoint, so the sensors and the change
+        # detection treat them the same way
+        data["traffic"] = self._update_traffic(data.get("cpe_detect"))
+        if self.signal_stats is not None:
+            data["signal"] = self._publish_signal_stats()
+
+        previous = self.data or {}
+        # Payloads served from the cache are the same object, so the identity check is usually enough
+        self.changed_endpoints = frozenset(
+            endpoint for endpoint, payload in data.items()
+            if payload is not previous.get(endpoint) and payload != previous.get(endpoint)
+        )
+
+        if "devicelist" in self.changed_endpoints:
+            self._update_device_index(data)
+        if "msgbox_count" in self.changed_endpoints:
+            self._sms_pending = True
+        if self._sms_pending:
+            await self._async_fetch_new_messages()
+        if self._store is not None and self._should_save(data):
+            self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+        return data
+
+    async def _async_fetch(self):
+        """Refresh the endpoints whose TTL expired, then those whose indicators changed meanwhile."""
+        data = await self.data_cache.refresh()
+        endpoints = set(self.data_cache.endpoints)
+        done = set()
+        stale = self.planner.stale_endpoints(data) & endpoints
+        while stale:
+            for endpoint in stale:
+                self.data_cache.invalidate(endpoint)
+            try:
+                data.update(await self.data_cache.refresh(stale))
+            except MiWiFiConnectionError as err:
+                _LOGGER.debug(f"Keeping previous {', '.join(stale)} data after error: {err}")
+                break
+            done |= stale
+            stale = (self.planner.stale_endpoints(data) & endpoints) - done
+        return data
+
+    def _update_traffic(self, cpe_detect):
+        """Sample the data usage counter if cpe_detect was fetched again and return the derived values."""
+        sampled_at = self.data_cache.fetched_at("cpe_detect")
+        if sampled_at is not None and sampled_at != self._traffic_sampled_at and cpe_detect:
+            self._traffic_sampled_at = sampled_at
+            try:
+                self.traffic.add(sampled_at, float(cpe_detect["net"]["info"]["datausage"]))
+            except (KeyError, TypeError, ValueError):
+                pass
+        rate = self.traffic.rate(TRAFFIC_RATE_SPAN.total_seconds())
+        usage = self.traffic.increase()
+        return {
+            # MB/s to kbit/s
+            "throughput": round(rate * 8000, 1) if rate is not None else None,
+            "usage_window": round(usage, 1) if usage is not None else None,
+        }
+
+    async def _async_sample_signal(self, now):
+        """Take one sample of the signal metrics, in between the regular refreshes."""
+        if not self._started or self.backoff.failures:
+            # Before the first refresh it would log in on its own and ignore the fleet's poll phase;
+            # while the router is down the regular refresh finds out when it is back
+            return
+        try:
+            payload = await self.data_cache.get_data("cpe_detect", max_age=self._signal_interval)
+        except MiWiFiConnectionError as err:
+            _LOGGER.debug(f"Skipping signal sample: {err}")
+            return
+        sampled_at = self.data_cache.fetched_at("cpe_detect")
+        if sampled_at == self._signal_sampled_at or not isinstance(payload, dict):
+            return
+        self._signal_sampled_at = sampled_at
+        info = (payload.get("net") or {}).get("info") or {}
+        for metric, window in self.signal_stats.items():
+            try:
+                window.add(float(info[metric]))
+            except (KeyError, TypeError, ValueError):
+                pass  # e.g. no 5G cell
+
+    def _publish_signal_stats(self):
+        """Return the signal statistics, recomputed once the current window is complete."""
+        now = time.monotonic()
+        if now - self._signal_published_at >= self._signal_window:
+            self._signal_published_at = now
+            self._signal_payload = {metric: window.stats() for metric, window in self.signal_stats.items()}
+            for window in self.signal_stats.values():
+                window.clear()
+        return self._signal_payload
+
+    async def _async_fetch_new_messages(self):
+        """Fetch the SMS inbox and fire an event for every message newer than the watermark."""
+        try:
+            async with self.data_cache.request_slot():
+                payload = await self.client.msgbox_list()
+        except MiWiFiConnectionError as err:
+            _LOGGER.debug(f"Fetching the SMS inbox failed, retrying with the next refresh: {err}")
+            return
+        # Without an answer (e.g. firmware without this endpoint) wait for the next count change
+        self._sms_pending = False
+        if payload is None:
+            return
+        for message in self.sms_inbox.new_messages(payload):
+            self.hass.bus.async_fire(EVENT_SMS_RECEIVED, {"host": self.client._host, **message})
+
+    def _update_device_index(self, data):
+        devices = (data.get("devicelist") or {}).get("list")
+        if isinstance(devices, list):
+            self.device_diff = self.device_index.update(devices)
+
+    def _should_save(self, data):
+        """Return True if the last refresh changed something worth writing to the store now."""
+        now = time.monotonic()
+        identity = (self.client.mac_address, self.client.firmware_version, self.sms_inbox.last_id)
+        changed = {endpoint for endpoint in self.changed_endpoints if data.get(endpoint) is not None}
+        if identity == self._saved_identity and not changed & STORAGE_TRIGGER_ENDPOINTS:
+            # The devicelist alone can be hundreds of KB, so frequent changes are saved rarely
+            if not changed or now - self._saved_at < STORAGE_MAX_AGE.total_seconds():
+                return False
+        self._saved_identity = identity
+        self._saved_at = now
+        return True
+
+    def _data_to_store(self):
+        # An endpoint that failed in the last refresh keeps its previous payload
+        self._stored_payloads.update(
+            (endpoint, payload) for endpoint, payload in (self.data or {}).items() if payload is not None
+        )
+        return {
+            "mac_address": self.client.mac_address,
+            "firmware_version": self.client.firmware_version,
+            "payloads": self._stored_payloads,
+            "sms_last_id": self.sms_inbox.last_id,
+        }
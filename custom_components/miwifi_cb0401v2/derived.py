@@ -0,0 +1,79 @@
+"""Values derived from consecutive samples, computed once per sample inside the integration."""
+from array import array
+from collections import deque
+
+class CounterRate:
+    """Rate and windowed increase of a cumulative counter such as net.info.datausage.
+
+    Samples live in a ring buffer that covers `window` seconds. When the counter goes down the
+    router restarted counting, so the previous total is carried over as an offset.
+    """
+
+    def __init__(self, window, maxlen):
+        self._window = window
+        self._samples = deque(maxlen=maxlen)  # (timestamp, reset-corrected total)
+        self._offset = 0.0
+        self._last_value = None
+
+    def add(self, timestamp, value):
+        if self._last_value is not None and value < self._last_value:
+            self._offset += self._last_value
+        self._last_value = value
+        self._samples.append((timestamp, value + self._offset))
+        while timestamp - self._samples[0][0] > self._window:
+            self._samples.popleft()
+
+    def rate(self, span):
+        """Average increase per second over the last `span` seconds, None without two samples."""
+        if len(self._samples) < 2:
+            return None
+        end_time, end_total = self._samples[-1]
+        for start_time, start_total in self._samples:
+            if end_time - start_time <= span:
+                break
+        if start_time == end_time:
+            # Only one sample within the span, fall back to the two most recent ones
+            start_time, start_total = self._samples[-2]
+        return (end_total - start_total) / (end_time - start_time)
+
+    def increase(self):
+        """Increase over the samples in the window, None without two samples."""
+        if len(self._samples) < 2:
+            return None
+        return self._samples[-1][1] - self._samples[0][1]
+
+class SampleWindow:
+    """Fixed number of float samples in an array used as ring buffer, summarised on demand."""
+
+    __slots__ = ("_values", "_next", "_count")
+
+    def __init__(self, capacity):
+        self._values = array("d", bytes(8 * capacity))
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def add(self, value):
+        self._values[self._next] = value
+        self._next = (self._next + 1) % len(self._values)
+        self._count = min(self._count + 1, len(self._values))
+
+    def clear(self):
+        self._next = 0
+        self._count = 0
+
+    def stats(self):
+        """min, mean, max and 5th percentile of the samples, None without samples."""
+        if not self._count:
+            return None
+        # Until the buffer wraps around the samples fill its start
+        values = sorted(self._values[:self._count])
+        return {
+            "min": values[0],
+            "mean": round(sum(values) / len(values), 1),
+            "max": values[-1],
+            "p5": values[int(0.05 * (len(values) - 1))],
+            "samples": len(values),
+        }
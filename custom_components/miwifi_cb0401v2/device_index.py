@@ -0,0 +1,62 @@
+from collections import namedtuple
+
+# The fields of a devicelist entry the entities care about. Other fields (online time, push
+# flags, ...) change on every poll and would otherwise mark every client as changed.
+ClientInfo = namedtuple("ClientInfo", ["mac", "name", "ip", "connection", "upspeed", "downspeed"])
+
+class DeviceDiff(namedtuple("DeviceDiff", ["joined", "left", "changed"])):
+    """MACs of the clients that joined, left or changed since the previous devicelist."""
+
+    def __contains__(self, mac):
+        return mac in self.joined or mac in self.left or mac in self.changed
+
+    def __bool__(self):
+        return bool(self.joined or self.left or self.changed)
+
+NO_CHANGES = DeviceDiff(frozenset(), frozenset(), frozenset())
+
+class DeviceIndex:
+    """Clients of the misystem/devicelist endpoint keyed by MAC address, updated incrementally."""
+
+    def __init__(self):
+        self.clients = {}
+
+    def update(self, devices):
+        """Apply a new list of devicelist entries and return what changed as a DeviceDiff."""
+        clients = {}
+        for device in devices:
+            info = _client_info(device)
+            if info is not None:
+                clients[info.mac] = info
+
+        previous = self.clients
+        joined = clients.keys() - previous.keys()
+        left = previous.keys() - clients.keys()
+        changed = {mac for mac in clients.keys() & previous.keys() if clients[mac] != previous[mac]}
+        self.clients = clients
+        return DeviceDiff(frozenset(joined), frozenset(left), frozenset(changed))
+
+def _client_info(device):
+    """Reduce a devicelist entry to a ClientInfo, or None if it has no MAC address."""
+    if not isinstance(device, dict) or not device.get("mac"):
+        return None
+    mac = device["mac"].upper()
+    # Each entry lists its addresses, the first one carries the current speeds
+    addresses = device.get("ip")
+    address = addresses[0] if isinstance(addresses, list) and addresses and isinstance(addresses[0], dict) else {}
+    statistics = device.get("statistics") if isinstance(device.get("statistics"), dict) else {}
+    return ClientInfo(
+        mac=mac,
+        name=device.get("name") or device.get("oname") or mac,
+        ip=address.get("ip"),
+        connection=device.get("type"),
+        upspeed=_to_int(address.get("upspeed", statistics.get("upspeed"))),
+        downspeed=_to_int(address.get("downspeed", statistics.get("downspeed"))),
+    )
+
+def _to_int(value):
+    """The router reports speeds as strings of bytes per second."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,94 @@
+import logging
+from homeassistant.components.device_tracker import ScannerEntity, SourceType
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
+    """Set up a device tracker for every client in the router's devicelist."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    if "devicelist" not in coordinator.data_cache.endpoints:
+        return  # devicelist is disabled in the options
+    prefix = f"{coordinator.client.mac_address}_"
+    tracked = set(coordinator.device_index.clients)
+
+    # Clients seen before the restart get their tracker back right away, so they show up as away
+    registry = er.async_get(hass)
+    for registry_entry in er.async_entries_for_config_entry(registry, entry.entry_id):
+        if registry_entry.domain == "device_tracker" and registry_entry.unique_id.startswith(prefix):
+            tracked.add(registry_entry.unique_id[len(prefix):])
+
+    @callback
+    def add_new_clients():
+        """Only clients that joined since the last refresh need new entities."""
+        new_macs = [mac for mac in coordinator.device_diff.joined if mac not in tracked]
+        if new_macs:
+            tracked.update(new_macs)
+            async_add_entities(MiWiFiClientTracker(coordinator, mac) for mac in new_macs)
+
+    async_add_entities(MiWiFiClientTracker(coordinator, mac) for mac in tracked)
+    entry.async_on_unload(coordinator.async_add_listener(add_new_clients))
+
+class MiWiFiClientTracker(CoordinatorEntity, ScannerEntity):
+    """Presence of one client of the router, driven by the diffed devicelist index."""
+
+    def __init__(self, coordinator, mac):
+        super().__init__(coordinator)
+        self._mac = mac
+        self._info = coordinator.device_index.clients.get(mac)
+        self._router_mac = coordinator.client.mac_address
+        self._written = None  # (presence fields, available) last written to Home Assistant
+
+    @property
+    def unique_id(self):
+        return f"{self._router_mac}_{self._mac}"
+
+    @property
+    def name(self):
+        return self._info.name if self._info else self._mac
+
+    @property
+    def source_type(self):
+        return SourceType.ROUTER
+
+    @property
+    def is_connected(self):
+        return self._info is not None
+
+    @property
+    def mac_address(self):
+        return self._mac
+
+    @property
+    def ip_address(self):
+        return self._info.ip if self._info else None
+
+    @property
+    def hostname(self):
+        return self._info.name if self._info else None
+
+    @property
+    def extra_state_attributes(self):
+        return {"connection": self._info.connection} if self._info else None
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        self._written = self._written_state()
+
+    def _written_state(self):
+        # Speeds are left out, they are handled by the speed sensors and don't concern the tracker
+        return (self._info[:4] if self._info else None, self.available)
+
+    @callback
+    def _handle_coordinator_update(self):
+        """Write the state only if this client joined, left or changed, or availability changed."""
+        if self._mac in self.coordinator.device_diff:
+            self._info = self.coordinator.device_index.clients.get(self._mac)
+        current = self._written_state()
+        if current != self._written:
+            self._written = current
+            self.async_write_ha_state()
@@ -0,0 +1,28 @@
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from .const import DATA_FLEET, DOMAIN
+
+# Credentials and anything that identifies the router, its SIM or its clients
+TO_REDACT = {"password", "username", "token", "mac", "mac_address", "sn", "imei", "ip", "ip6addr", "ssid", "list"}
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry):
+    """Return request statistics and the last payloads for the diagnostics download."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": coordinator.update_interval.total_seconds() if coordinator.update_interval else None,
+            "consecutive_failures": coordinator.backoff.failures,
+            "last_refresh_duration_ms": round(coordinator.last_refresh_duration * 1000, 1) if coordinator.last_refresh_duration is not None else None,
+            "clients": len(coordinator.device_index.clients),
+        },
+        "requests": coordinator.client.stats.as_dict(),
+        "cache": coordinator.data_cache.stats(),
+        "fleet": {
+            "routers": len(hass.data[DATA_FLEET]),
+            "requests_in_flight": hass.data[DATA_FLEET].limiter.in_use,
+        },
+        "payloads": async_redact_data(coordinator.data or {}, TO_REDACT),
+    }
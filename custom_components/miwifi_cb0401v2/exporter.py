@@ -0,0 +1,161 @@
+"""Poll routers without Home Assistant and write the values as JSON lines or Prometheus metrics.
+
+Only uses the modules that don't import Home Assistant (api, cache, extract, fleet), so it can
+run as a small exporter next to Home Assistant, from the repository root or through the
+scripts/miwifi_exporter.py wrapper:
+
+    python -m custom_components.miwifi_cb0401v2.exporter --password secret 192.168.31.1 10.0.0.1:8443
+    python scripts/miwifi_exporter.py --routers-file routers.txt --format prometheus --output /var/lib/node_exporter/miwifi.prom
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import timedelta
+
+from .api import MiWiFiClient, MiWiFiConnectionError, create_session
+from .cache import DataCache
+from .const import DEFAULT_TIMEOUT, DEFAULT_USERNAME, FLEET_MAX_CONCURRENT_REQUESTS, MAX_CONCURRENT_REQUESTS
+from .extract import compile_extractor
+from .fleet import FairLimiter
+
+# (metric name, endpoint, sensor key, help) of the exported values, all numeric
+METRICS = (
+    ("rsrp_dbm", "cpe_detect", "net.info.rsrp", "LTE reference signal received power"),
+    ("rsrq_db", "cpe_detect", "net.info.rsrq", "LTE reference signal received quality"),
+    ("snr_db", "cpe_detect", "net.info.snr", "LTE signal to noise ratio"),
+    ("rsrp_5g_dbm", "cpe_detect", "net.info.rsrp_5g", "5G reference signal received power"),
+    ("rsrq_5g_db", "cpe_detect", "net.info.rsrq_5g", "5G reference signal received quality"),
+    ("snr_5g_db", "cpe_detect", "net.info.snr_5g", "5G signal to noise ratio"),
+    ("data_usage_megabytes", "cpe_detect", "net.info.datausage", "Cumulative mobile data usage"),
+    ("online_stations_2g", "newstatus", "2g.online_sta_count", "Online Wi-Fi clients on 2.4 GHz"),
+    ("online_stations_5g", "newstatus", "5g.online_sta_count", "Online Wi-Fi clients on 5 GHz"),
+    ("sms_messages", "msgbox_count", "count", "SMS messages stored on the router"),
+    ("connected_devices", "devicelist", "list", "Clients in the router's device list"),
+)
+
+def _number(value):
+    """Numeric value of an extracted state, None if it isn't one."""
+    if isinstance(value, list):
+        return len(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+class RouterPoller:
+    """Client, cache and extractors of one router; about as small as the integration's own."""
+
+    __slots__ = ("host", "client", "cache", "metrics")
+
+    def __init__(self, host, password, endpoints, limiter, timeout=DEFAULT_TIMEOUT, username=DEFAULT_USERNAME):
+        self.host = host
+        self.client = MiWiFiClient(host, username, password, create_session(timeout=timeout))
+        # A zero TTL fetches every endpoint on every poll; the cache still coalesces and caps the requests
+        self.cache = DataCache(
+            self.client, {endpoint: timedelta(0) for endpoint in endpoints},
+            max_concurrency=MAX_CONCURRENT_REQUESTS,
+            shared_slot=lambda: limiter.slot(host),
+        )
+        # The devicelist is exported as its length, so it must not be reduced to its first entry
+        self.metrics = [
+            (name, endpoint, (lambda data, key=key: data.get(key)) if endpoint == "devicelist" else compile_extractor(key))
+            for name, endpoint, key, _ in METRICS if endpoint in endpoints
+        ]
+
+    async def poll(self):
+        """Return {"router", "time", "up", metric: value...} with the values that could be read."""
+        result = {"router": self.host, "time": round(time.time(), 3)}
+        try:
+            data = await self.cache.refresh()
+        except MiWiFiConnectionError as err:
+            return {**result, "up": 0, "error": str(err)}
+        # Without a session the client answers None instead of raising
+        result["up"] = int(any(data.values()))
+        for name, endpoint, extract in self.metrics:
+            payload = data.get(endpoint)
+            value = _number(extract(payload)) if payload else None
+            if value is not None:
+                result[name] = value
+        return result
+
+    async def close(self):
+        await self.client.close()
+
+def format_prometheus(results, prefix="miwifi_"):
+    """Prometheus text exposition of the poll results of all routers."""
+    lines = [f"# HELP {prefix}up Whether the router answered the last poll", f"# TYPE {prefix}up gauge"]
+    lines += [f'{prefix}up{{router="{result["router"]}"}} {result["up"]}' for result in results]
+    for name, _, _, help_text in METRICS:
+        samples = [f'{prefix}{name}{{router="{result["router"]}"}} {result[name]:g}' for result in results if name in result]
+        if samples:
+            lines += [f"# HELP {prefix}{name} {help_text}", f"# TYPE {prefix}{name} gauge", *samples]
+    return "\n".join(lines) + "\n"
+
+def _write_atomically(path, text):
+    """Replace the file in one step, so a collector never reads half of it."""
+    temp = f"{path}.tmp"
+    with open(temp, "w") as file:
+        file.write(text)
+    os.replace(temp, path)
+
+def read_routers(args):
+    """(host, password) of the routers given on the command line and in the routers file."""
+    routers = [(host, args.password) for host in args.hosts]
+    if args.routers_file:
+        with open(args.routers_file) as file:
+            for line in file:
+                fields = line.split()
+                if fields and not fields[0].startswith("#"):
+                    routers.append((fields[0], fields[1] if len(fields) > 1 else args.password))
+    return routers
+
+async def run(args, out=sys.stdout):
+    """Poll all routers concurrently every interval seconds, or once."""
+    endpoints = ["cpe_detect", "newstatus", "msgbox_count"] + (["devicelist"] if args.devicelist else [])
+    limiter = FairLimiter(args.concurrency)
+    pollers = [RouterPoller(host, password, endpoints, limiter, timeout=args.timeout) for host, password in read_routers(args)]
+    if not pollers:
+        raise SystemExit("No routers given")
+    try:
+        await asyncio.gather(*(poller.client.login() for poller in pollers))
+        while True:
+            started = time.monotonic()
+            results = await asyncio.gather(*(poller.poll() for poller in pollers))
+            if args.format == "prometheus":
+                text = format_prometheus(results)
+                if args.output:
+                    _write_atomically(args.output, text)
+                else:
+                    out.write(text + "\n")
+            else:
+                out.write("".join(json.dumps(result) + "\n" for result in results))
+            out.flush()
+            if args.once:
+                return
+            await asyncio.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+    finally:
+        await asyncio.gather(*(poller.close() for poller in pollers))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("hosts", nargs="*", help="router addresses, optionally with :port")
+    parser.add_argument("--password", default=os.environ.get("MIWIFI_PASSWORD"), help="password of the routers given as arguments, or $MIWIFI_PASSWORD")
+    parser.add_argument("--routers-file", help="file with one 'host [password]' per line")
+    parser.add_argument("--format", choices=("jsonl", "prometheus"), default="jsonl")
+    parser.add_argument("--output", help="with --format prometheus, file to replace on every poll instead of stdout")
+    parser.add_argument("--interval", type=float, default=30.0, help="seconds between polls")
+    parser.add_argument("--once", action="store_true", help="poll once and exit")
+    parser.add_argument("--devicelist", action="store_true", help="also poll the device list, the heaviest request")
+    parser.add_argument("--concurrency", type=int, default=FLEET_MAX_CONCURRENT_REQUESTS, help="requests in flight to all routers together")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds per request")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Turn sensor definitions into accessors that pull a state value out of an endpoint payload.
+
+The dotted sensor key and the optional data path never change, so they are parsed once when
+the sensor is created instead of on every update.
+"""
+
+_MISSING = object()
+
+def compile_extractor(sensor_key, data_path=None):
+    """Return a function payload -> state value for a dotted key like 'net.info.rsrp'.
+
+    A missing key or a non-dict on the way down yields None.
+    """
+    keys = tuple(sensor_key.split("."))
+    post_process = _compile_data_path(data_path)
+
+    def extract(data):
+        value = data
+        for key in keys:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(key, _MISSING)
+            if value is _MISSING:
+                return None
+        return post_process(value)
+
+    return extract
+
+def _compile_data_path(data_path):
+    """Return the post-processor for the value found under the sensor key."""
+    if data_path is None:
+        return _to_state
+
+    if isinstance(data_path, int):
+        def by_index(value):
+            # e.g. the first or second DNS server of a list
+            if isinstance(value, list) and data_path < len(value):
+                value = value[data_path]
+            elif isinstance(value, dict):
+                value = None
+            return _to_state(value)
+        return by_index
+
+    def by_name(value):
+        if isinstance(value, dict):
+            value = value.get(data_path)
+        elif isinstance(value, list):
+            # Lists of dicts with named fields, e.g. several IPv6 addresses
+            value = ', '.join(filter(None, [item.get(data_path) for item in value if isinstance(item, dict)]))
+        return _to_state(value)
+    return by_name
+
+def _to_state(value):
+    """Reduce lists to a displayable value; dicts are not displayable and become None."""
+    if isinstance(value, list) and value:
+        if all(isinstance(item, list) for item in value):
+            return ', '.join(map(str, [subitem for sublist in value for subitem in sublist]))
+        value = value[0]
+    if isinstance(value, dict):
+        return None
+    return value
@@ -0,0 +1,123 @@
+"""Scheduling shared by the routers of all config entries: request slots and poll phases."""
+import asyncio
+import contextlib
+from collections import OrderedDict, deque
+
+# Fractional part of the golden ratio: consecutive multiples of it spread evenly over [0, 1)
+# however many routers there are.
+_GOLDEN_RATIO = 0.6180339887498949
+
+class FairLimiter:
+    """Caps the requests in flight across all routers and hands out free slots round-robin.
+
+    Waiting requests are queued per router. When a slot frees up it goes to the next router in
+    turn, so a router with many queued or slow requests cannot starve the others. A router can be
+    restricted to fewer slots, e.g. while it doesn't answer and its requests only wait for timeouts.
+    """
+
+    def __init__(self, limit):
+        self._limit = limit
+        self._in_use = 0
+        self._in_use_by = {}  # router -> slots it holds
+        self._restricted = {}  # router -> maximum slots it may hold
+        self._waiters = OrderedDict()  # router -> queued futures, in round-robin order
+
+    @property
+    def in_use(self):
+        return self._in_use
+
+    def restrict(self, key, limit):
+        """Let the router hold at most limit slots, or lift the restriction with None."""
+        if limit is None:
+            self._restricted.pop(key, None)
+            self._wake_next()
+        else:
+            self._restricted[key] = limit
+
+    @contextlib.asynccontextmanager
+    async def slot(self, key):
+        """Hold one request slot for the router while the context is active."""
+        await self._acquire(key)
+        try:
+            yield
+        finally:
+            self._release(key)
+
+    def _may_take(self, key):
+        limit = self._restricted.get(key)
+        return limit is None or self._in_use_by.get(key, 0) < limit
+
+    def _take(self, key):
+        self._in_use += 1
+        self._in_use_by[key] = self._in_use_by.get(key, 0) + 1
+
+    async def _acquire(self, key):
+        if self._in_use < self._limit and key not in self._waiters and self._may_take(key):
+            self._take(key)
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just before the cancellation, pass it on
+                self._release(key)
+            else:
+                queue = self._waiters.get(key)
+                if queue is not None and future in queue:
+                    queue.remove(future)
+                    if not queue:
+                        del self._waiters[key]
+            raise
+
+    def _release(self, key):
+        self._in_use -= 1
+        self._in_use_by[key] -= 1
+        if not self._in_use_by[key]:
+            del self._in_use_by[key]
+        self._wake_next()
+
+    def _wake_next(self):
+        """Grant free slots to the waiting routers in turn."""
+        granted = True
+        while granted:
+            granted = False
+            for key in list(self._waiters):
+                if self._in_use >= self._limit:
+                    return
+                if not self._may_take(key):
+                    continue
+                queue = self._waiters.pop(key)
+                while queue and queue[0].done():
+                    queue.popleft()  # Cancelled while waiting
+                if not queue:
+                    continue
+                future = queue.popleft()
+                if queue:
+                    self._waiters[key] = queue  # Back of the line
+                self._take(key)
+                future.set_result(None)
+                granted = True
+
+class Fleet:
+    """The routers of all config entries, sharing one FairLimiter and staggered poll phases."""
+
+    def __init__(self, max_concurrency):
+        self.limiter = FairLimiter(max_concurrency)
+        self._members = {}  # router -> position, the lowest free one when it joined
+
+    def __len__(self):
+        return len(self._members)
+
+    def join(self, key):
+        positions = set(self._members.values())
+        self._members[key] = next(position for position in range(len(positions) + 1) if position not in positions)
+
+    def leave(self, key):
+        self._members.pop(key, None)
+        self.limiter.restrict(key, None)
+
+    def phase(self, key, interval):
+        """Seconds the router's polls are shifted by within interval, so they don't all fire together."""
+        return (self._members.get(key, 0) * _GOLDEN_RATIO) % 1 * interval
@@ -0,0 +1,45 @@
+"""Decide which endpoints to refetch before their TTL, based on cheap indicators in other payloads."""
+
+def _getter(path):
+    """Return a function payload -> raw value under a dotted path, None if it is missing."""
+    keys = tuple(path.split("."))
+
+    def get(payload):
+        value = payload
+        for key in keys:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(key)
+        return value
+
+    return get
+
+class RefreshPlanner:
+    """Refetch a heavy endpoint as soon as an indicator in a cheaper endpoint's payload changes.
+
+    triggers is a sequence of (source endpoint, indicator paths, target endpoint). The target's
+    TTL then only is its maximum age, e.g. the devicelist is fetched when the station counts in
+    newstatus change, and at the latest when its TTL expires.
+    """
+
+    def __init__(self, triggers):
+        self._triggers = [
+            (source, tuple(_getter(path) for path in paths), target)
+            for source, paths, target in triggers
+        ]
+        self._indicators = [None] * len(self._triggers)  # Values seen in the last refresh
+
+    def stale_endpoints(self, data):
+        """Return the target endpoints whose indicators changed since the previous call."""
+        stale = set()
+        for index, (source, getters, target) in enumerate(self._triggers):
+            payload = data.get(source)
+            if not payload:
+                continue
+            values = tuple(get(payload) for get in getters)
+            previous = self._indicators[index]
+            self._indicators[index] = values
+            # The first payload only sets the baseline, the target is fetched by its TTL anyway
+            if previous is not None and values != previous:
+                stale.add(target)
+        return stale
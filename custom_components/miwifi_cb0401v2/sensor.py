@@ -1,150 +1,158 @@
 import logging
-import asyncio
-from datetime import datetime, timedelta
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
-from homeassistant.const import UnitOfInformation, SIGNAL_STRENGTH_DECIBELS
-from .const import DOMAIN
+from homeassistant.const import EntityCategory, UnitOfDataRate, UnitOfInformation, UnitOfTime, SIGNAL_STRENGTH_DECIBELS
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from .const import CONF_SENSOR_GROUPS, DOMAIN, SENSOR_GROUPS
+from .extract import compile_extractor
 
 _LOGGER = logging.getLogger(__name__)
 
-class DataCache:
-    """Cache for data from different API endpoints."""
-
-    def __init__(self, client, refresh_interval=timedelta(minutes=1)):
-        self._client = client
-        self._refresh_interval = refresh_interval
-        self._cpe_data = None
-        self._newstatus_data = None
-        self._devicelist_data = None
-        self._msgbox_count_data = None
-        self._last_update = None
-        self._lock = asyncio.Lock()
-
-    async def get_data(self, endpoint):
-        """Get cached data for a specified endpoint or update if needed."""
-        async with self._lock:
-            now = datetime.now()
-            if endpoint == "cpe_detect":
-                if not self._cpe_data or not self._last_update or now - self._last_update > self._refresh_interval:
-                    self._cpe_data = await self._client.cpe_detect()
-                    self._last_update = now
-                    _LOGGER.debug(f"Data from cpe_detect updated: {self._cpe_data}")
-                else:
-                    _LOGGER.debug("Using cached data from cpe_detect")
-                return self._cpe_data
-            elif endpoint == "newstatus":
-                if not self._newstatus_data or not self._last_update or now - self._last_update > self._refresh_interval:
-                    self._newstatus_data = await self._client.newstatus()
-                    self._last_update = now
-                    _LOGGER.debug(f"Data from newstatus updated: {self._newstatus_data}")
-                else:
-                    _LOGGER.debug("Using cached data from newstatus")
-                return self._newstatus_data
-            elif endpoint == "devicelist":
-                if not self._devicelist_data or not self._last_update or now - self._last_update > self._refresh_interval:
-                    self._devicelist_data = await self._client.devicelist()
-                    self._last_update = now
-                    _LOGGER.debug(f"Data from devicelist updated: {self._devicelist_data}")
-                else:
-                    _LOGGER.debug("Using cached data from devicelist")
-                return self._devicelist_data
-            elif endpoint == "msgbox_count":
-                if not self._msgbox_count_data or not self._last_update or now - self._last_update > self._refresh_interval:
-                    self._msgbox_count_data = await self._client.msgbox_count()
-                    self._last_update = now
-                    _LOGGER.debug(f"Data from msgbox_count updated: {self._msgbox_count_data}")
-                else:
-                    _LOGGER.debug("Using cached data from msgbox_count")
-                return self._msgbox_count_data
-
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
     """Set up MiWiFi sensors based on a config entry."""
-    client = hass.data[DOMAIN][entry.entry_id]
-    data_cache = DataCache(client)
-
-    # Define sensors with different endpoints
-    sensors = (
-        create_general_sensors(client, data_cache) +
-        create_specific_sensors(client, data_cache) +
-        create_newstatus_sensors(client, data_cache) +
-        create_devicelist_sensors(client, data_cache) +
-        create_msgbox_sensors(client, data_cache)
-    )
-    async_add_entities(sensors, True)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    groups = entry.options.get(CONF_SENSOR_GROUPS, list(SENSOR_GROUPS))
+
+    # Define sensors with different endpoints, only for the sensor groups enabled in the options
+    group_factories = {
+        "general": (create_general_sensors, create_traffic_sensors, create_signal_stats_sensors),
+        "specific": (create_specific_sensors,),
+        "newstatus": (create_newstatus_sensors,),
+        "devicelist": (create_devicelist_sensors,),
+        "msgbox": (create_msgbox_sensors,),
+    }
+    sensors = create_diagnostic_sensors(coordinator)
+    for group, factories in group_factories.items():
+        if group in groups:
+            for factory in factories:
+                sensors += factory(coordinator)
+    async_add_entities(sensors)
+
+    if "devicelist" not in groups:
+        return
+
+    # Per-client speed sensors are added as clients show up in the devicelist
+    known_clients = set()
+
+    @callback
+    def add_client_sensors(macs=None):
+        clients = coordinator.device_index.clients
+        new_clients = [clients[mac] for mac in (coordinator.device_diff.joined if macs is None else macs) if mac not in known_clients]
+        if new_clients:
+            known_clients.update(info.mac for info in new_clients)
+            async_add_entities(create_client_sensors(coordinator, new_clients))
+
+    add_client_sensors(list(coordinator.device_index.clients))
+    entry.async_on_unload(coordinator.async_add_listener(add_client_sensors))
 
 # -----------------------------------------------------------------------------
 # Sensor factory helpers
 # -----------------------------------------------------------------------------
 
-def create_general_sensors(client, data_cache):
+def create_general_sensors(coordinator):
     """Define the list of general sensors from the cpe_detect endpoint."""
     return [
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.info.cell_band", "Cell Band", icon="mdi:satellite"),
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.info.cell_band_5g", "Cell Band 5G", icon="mdi:satellite-variant"),
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.info.ci", "Cell ID", icon="mdi:map-marker"),
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.info.datausage", "Data Usage", native_unit=UnitOfInformation.MEGABYTES, device_class=SensorDeviceClass.DATA_SIZE, icon="mdi:database", state_class=SensorStateClass.TOTAL),
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.info.linktype", "Link Type", icon="mdi:network"),
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.info.operator", "Operator", icon="mdi:cellphone"),
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.info.freqband", "Frequency Band", icon="mdi:signal"),
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.info.rsrp", "RSRP", native_unit=SIGNAL_STRENGTH_DECIBELS, device_class=SensorDeviceClass.SIGNAL_STRENGTH, icon="mdi:signal", state_class=SensorStateClass.MEASUREMENT),
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.info.rsrp_5g", "RSRP 5G", native_unit=SIGNAL_STRENGTH_DECIBELS, device_class=SensorDeviceClass.SIGNAL_STRENGTH, icon="mdi:signal-variant", state_class=SensorStateClass.MEASUREMENT),
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.info.rsrq", "RSRQ", native_unit=SIGNAL_STRENGTH_DECIBELS, device_class=SensorDeviceClass.SIGNAL_STRENGTH, icon="mdi:signal", state_class=SensorStateClass.MEASUREMENT),
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.info.rsrq_5g", "RSRQ 5G", native_unit=SIGNAL_STRENGTH_DECIBELS, device_class=SensorDeviceClass.SIGNAL_STRENGTH, icon="mdi:signal-variant", state_class=SensorStateClass.MEASUREMENT),
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.info.snr", "SNR", native_unit=SIGNAL_STRENGTH_DECIBELS, icon="mdi:signal", state_class=SensorStateClass.MEASUREMENT),
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.info.snr_5g", "SNR 5G", native_unit=SIGNAL_STRENGTH_DECIBELS, icon="mdi:signal-variant", state_class=SensorStateClass.MEASUREMENT),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.info.cell_band", "Cell Band", icon="mdi:satellite"),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.info.cell_band_5g", "Cell Band 5G", icon="mdi:satellite-variant"),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.info.ci", "Cell ID", icon="mdi:map-marker"),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.info.datausage", "Data Usage", native_unit=UnitOfInformation.MEGABYTES, device_class=SensorDeviceClass.DATA_SIZE, icon="mdi:database", state_class=SensorStateClass.TOTAL),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.info.linktype", "Link Type", icon="mdi:network"),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.info.operator", "Operator", icon="mdi:cellphone"),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.info.freqband", "Frequency Band", icon="mdi:signal"),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.info.rsrp", "RSRP", native_unit=SIGNAL_STRENGTH_DECIBELS, device_class=SensorDeviceClass.SIGNAL_STRENGTH, icon="mdi:signal", state_class=SensorStateClass.MEASUREMENT),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.info.rsrp_5g", "RSRP 5G", native_unit=SIGNAL_STRENGTH_DECIBELS, device_class=SensorDeviceClass.SIGNAL_STRENGTH, icon="mdi:signal-variant", state_class=SensorStateClass.MEASUREMENT),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.info.rsrq", "RSRQ", native_unit=SIGNAL_STRENGTH_DECIBELS, device_class=SensorDeviceClass.SIGNAL_STRENGTH, icon="mdi:signal", state_class=SensorStateClass.MEASUREMENT),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.info.rsrq_5g", "RSRQ 5G", native_unit=SIGNAL_STRENGTH_DECIBELS, device_class=SensorDeviceClass.SIGNAL_STRENGTH, icon="mdi:signal-variant", state_class=SensorStateClass.MEASUREMENT),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.info.snr", "SNR", native_unit=SIGNAL_STRENGTH_DECIBELS, icon="mdi:signal", state_class=SensorStateClass.MEASUREMENT),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.info.snr_5g", "SNR 5G", native_unit=SIGNAL_STRENGTH_DECIBELS, icon="mdi:signal-variant", state_class=SensorStateClass.MEASUREMENT),
     ]
 
-def create_specific_sensors(client, data_cache):
+def create_specific_sensors(coordinator):
     """Define additional specific sensors for IP, mask, and DNS entries from the cpe_detect endpoint."""
     return [
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.ipv4info.ipv4", "IPv4 Address", data_path="ip", icon="mdi:ip"),
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.ipv4info.ipv4", "IPv4 Netmask", data_path="mask", icon="mdi:ip"),
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.ipv4info.dns", "IPv4 DNS 1", data_path=0, icon="mdi:dns"),
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.ipv4info.dns", "IPv4 DNS 2", data_path=1, icon="mdi:dns"),
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.ipv6info.ip6addr", "IPv6 Address", data_path="ip", icon="mdi:ip"),
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.ipv6info.dns", "IPv6 DNS 1", data_path=0, icon="mdi:dns"),
-        BaseMiWiFiSensor(client, data_cache, "cpe_detect", "net.ipv6info.dns", "IPv6 DNS 2", data_path=1, icon="mdi:dns"),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.ipv4info.ipv4", "IPv4 Address", data_path="ip", icon="mdi:ip"),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.ipv4info.ipv4", "IPv4 Netmask", data_path="mask", icon="mdi:ip"),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.ipv4info.dns", "IPv4 DNS 1", data_path=0, icon="mdi:dns"),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.ipv4info.dns", "IPv4 DNS 2", data_path=1, icon="mdi:dns"),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.ipv6info.ip6addr", "IPv6 Address", data_path="ip", icon="mdi:ip"),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.ipv6info.dns", "IPv6 DNS 1", data_path=0, icon="mdi:dns"),
+        BaseMiWiFiSensor(coordinator, "cpe_detect", "net.ipv6info.dns", "IPv6 DNS 2", data_path=1, icon="mdi:dns"),
     ]
 
-def create_devicelist_sensors(client, data_cache):
+def create_devicelist_sensors(coordinator):
     """Define sensors for the devicelist endpoint."""
     return [
-        DeviceCountSensor(client, data_cache, "devicelist", "list", "Connected Devices", icon="mdi:lan-connect", state_class=SensorStateClass.MEASUREMENT)
+        DeviceCountSensor(coordinator, "devicelist", "list", "Connected Devices", icon="mdi:lan-connect", state_class=SensorStateClass.MEASUREMENT)
     ]
 
-def create_msgbox_sensors(client, data_cache):
+def create_msgbox_sensors(coordinator):
     """Define sensor for the SMS message box count endpoint."""
     return [
-        BaseMiWiFiSensor(client, data_cache, "msgbox_count", "count", "SMS Messages", icon="mdi:message-text", state_class=SensorStateClass.MEASUREMENT)
+        BaseMiWiFiSensor(coordinator, "msgbox_count", "count", "SMS Messages", icon="mdi:message-text", state_class=SensorStateClass.MEASUREMENT)
+    ]
+
+def create_client_sensors(coordinator, clients):
+    """Define speed sensors for clients whose devicelist entry reports speeds."""
+    sensors = []
+    for info in clients:
+        if info.downspeed is not None:
+            sensors.append(ClientSpeedSensor(coordinator, info.mac, "downspeed", f"{info.name} Download Speed", icon="mdi:download"))
+        if info.upspeed is not None:
+            sensors.append(ClientSpeedSensor(coordinator, info.mac, "upspeed", f"{info.name} Upload Speed", icon="mdi:upload"))
+    return sensors
+
+def create_traffic_sensors(coordinator):
+    """Define sensors derived from consecutive samples of the data usage counter."""
+    return [
+        BaseMiWiFiSensor(coordinator, "traffic", "throughput", "Throughput", native_unit=UnitOfDataRate.KILOBITS_PER_SECOND, device_class=SensorDeviceClass.DATA_RATE, icon="mdi:swap-vertical", state_class=SensorStateClass.MEASUREMENT),
+        BaseMiWiFiSensor(coordinator, "traffic", "usage_window", "Data Usage Last Hour", native_unit=UnitOfInformation.MEGABYTES, device_class=SensorDeviceClass.DATA_SIZE, icon="mdi:database-clock", state_class=SensorStateClass.MEASUREMENT),
+    ]
+
+def create_signal_stats_sensors(coordinator):
+    """Define sensors for the windowed signal statistics, if fast signal sampling is enabled."""
+    if coordinator.signal_stats is None:
+        return []
+    return [
+        SignalStatsSensor(coordinator, "signal", "rsrp", "RSRP Mean", data_path="mean", native_unit=SIGNAL_STRENGTH_DECIBELS, device_class=SensorDeviceClass.SIGNAL_STRENGTH, icon="mdi:chart-bell-curve", state_class=SensorStateClass.MEASUREMENT),
+        SignalStatsSensor(coordinator, "signal", "rsrq", "RSRQ Mean", data_path="mean", native_unit=SIGNAL_STRENGTH_DECIBELS, device_class=SensorDeviceClass.SIGNAL_STRENGTH, icon="mdi:chart-bell-curve", state_class=SensorStateClass.MEASUREMENT),
+        SignalStatsSensor(coordinator, "signal", "snr", "SNR Mean", data_path="mean", native_unit=SIGNAL_STRENGTH_DECIBELS, icon="mdi:chart-bell-curve", state_class=SensorStateClass.MEASUREMENT),
+        SignalStatsSensor(coordinator, "signal", "rsrp_5g", "RSRP 5G Mean", data_path="mean", native_unit=SIGNAL_STRENGTH_DECIBELS, device_class=SensorDeviceClass.SIGNAL_STRENGTH, icon="mdi:chart-bell-curve", state_class=SensorStateClass.MEASUREMENT),
+        SignalStatsSensor(coordinator, "signal", "rsrq_5g", "RSRQ 5G Mean", data_path="mean", native_unit=SIGNAL_STRENGTH_DECIBELS, device_class=SensorDeviceClass.SIGNAL_STRENGTH, icon="mdi:chart-bell-curve", state_class=SensorStateClass.MEASUREMENT),
+        SignalStatsSensor(coordinator, "signal", "snr_5g", "SNR 5G Mean", data_path="mean", native_unit=SIGNAL_STRENGTH_DECIBELS, icon="mdi:chart-bell-curve", state_class=SensorStateClass.MEASUREMENT),
     ]
 
-def create_newstatus_sensors(client, data_cache):
+def create_diagnostic_sensors(coordinator):
+    """Define sensors about the polling itself."""
+    return [
+        PollLatencySensor(coordinator, None, "poll_latency", "Poll Latency", native_unit=UnitOfTime.MILLISECONDS, device_class=SensorDeviceClass.DURATION, icon="mdi:timer-outline", state_class=SensorStateClass.MEASUREMENT)
+    ]
+
+def create_newstatus_sensors(coordinator):
     """Define additional sensors for the newstatus endpoint."""
     return [
-        BaseMiWiFiSensor(client, data_cache, "newstatus", "hardware.mac", "MAC Address", icon="mdi:barcode"),
-        BaseMiWiFiSensor(client, data_cache, "newstatus", "hardware.sn", "Serial Number", icon="mdi:identifier"),
-        BaseMiWiFiSensor(client, data_cache, "newstatus", "hardware.version", "Firmware Version", icon="mdi:update"),
-        BaseMiWiFiSensor(client, data_cache, "newstatus", "hardware.imei", "IMEI", icon="mdi:cellphone"),
-        BaseMiWiFiSensor(client, data_cache, "newstatus", "2g.ssid", "SSID 2.4GHz", icon="mdi:wifi"),
-        BaseMiWiFiSensor(client, data_cache, "newstatus", "5g.ssid", "SSID 5GHz", icon="mdi:wifi"),
-        BaseMiWiFiSensor(client, data_cache, "newstatus", "2g.online_sta_count", "Online Devices 2.4GHz", icon="mdi:devices"),
-        BaseMiWiFiSensor(client, data_cache, "newstatus", "5g.online_sta_count", "Online Devices 5GHz", icon="mdi:devices"),
+        BaseMiWiFiSensor(coordinator, "newstatus", "hardware.mac", "MAC Address", icon="mdi:barcode"),
+        BaseMiWiFiSensor(coordinator, "newstatus", "hardware.sn", "Serial Number", icon="mdi:identifier"),
+        BaseMiWiFiSensor(coordinator, "newstatus", "hardware.version", "Firmware Version", icon="mdi:update"),
+        BaseMiWiFiSensor(coordinator, "newstatus", "hardware.imei", "IMEI", icon="mdi:cellphone"),
+        BaseMiWiFiSensor(coordinator, "newstatus", "2g.ssid", "SSID 2.4GHz", icon="mdi:wifi"),
+        BaseMiWiFiSensor(coordinator, "newstatus", "5g.ssid", "SSID 5GHz", icon="mdi:wifi"),
+        BaseMiWiFiSensor(coordinator, "newstatus", "2g.online_sta_count", "Online Devices 2.4GHz", icon="mdi:devices"),
+        BaseMiWiFiSensor(coordinator, "newstatus", "5g.online_sta_count", "Online Devices 5GHz", icon="mdi:devices"),
     ]
 
 # -----------------------------------------------------------------------------
 # Entity classes
 # -----------------------------------------------------------------------------
 
-class BaseMiWiFiSensor(SensorEntity):
+class BaseMiWiFiSensor(CoordinatorEntity, SensorEntity):
     """Base class for all MiWiFi sensors."""
 
-    def __init__(self, client, data_cache, endpoint, sensor_key, name, data_path=None, native_unit=None, device_class=None, icon=None, state_class=None):
+    def __init__(self, coordinator, endpoint, sensor_key, name, data_path=None, native_unit=None, device_class=None, icon=None, state_class=None):
         """Initialize the sensor with endpoint flexibility."""
-        self._client = client
-        self._data_cache = data_cache
+        super().__init__(coordinator)
+        self._client = coordinator.client
         self._endpoint = endpoint  # Specifies which endpoint to use
         self._sensor_key = sensor_key
         self._name = name
@@ -155,7 +163,10 @@ class BaseMiWiFiSensor(SensorEntity):
         self._state_class = state_class
         self._state = None
         self._available = False
-        self._mac_address = client.mac_address
+        self._written = None  # (state, available) last written to Home Assistant
+        self._mac_address = self._client.mac_address
+        self._extract = compile_extractor(sensor_key, data_path)  # Parse the key path only once
+        self._update_from_data(coordinator.data)
 
     @property
     def device_info(self):
@@ -208,60 +219,43 @@ class BaseMiWiFiSensor(SensorEntity):
 
     @property
     def available(self):
-        return self._available
-
-    async def async_update(self):
-        """Fetch data from the specified endpoint and update the sensor state."""
-        data = await self._data_cache.get_data(self._endpoint)
-        _LOGGER.debug(f"Fetched data for endpoint '{self._endpoint}': {data}")
+        return super().available and self._available
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        self._written = (self._state, self.available)
+
+    def _is_affected(self):
+        """Return True if the last refresh may have changed this sensor's value."""
+        return self._endpoint in self.coordinator.changed_endpoints
+
+    @callback
+    def _handle_coordinator_update(self):
+        """Update the state from the data pushed by the coordinator, if it changed."""
+        if self._is_affected():
+            self._update_from_data(self.coordinator.data)
+        # Unchanged states are not written, so they cause no recorder or event bus traffic
+        current = (self._state, self.available)
+        if current != self._written:
+            self._written = current
+            self.async_write_ha_state()
+
+    def _update_from_data(self, payloads):
+        """Extract the sensor value from the payloads of the last refresh."""
+        data = payloads.get(self._endpoint) if payloads else None
 
         if data:
-            # Traverse nested keys in `sensor_key` to locate the specific data value
-            keys = self._sensor_key.split(".")
-            value = data
-            for key in keys:
-                if isinstance(value, dict):
-                    value = value.get(key, {})
-                else:
-                    _LOGGER.warning(f"Key '{key}' missing in data for sensor '{self._name}'")
-                    value = None
-                    break
-
-            # Process `data_path` for additional extraction, handling both dict and list cases
-            if value is not None and self._data_path is not None:
-                if isinstance(value, dict) and isinstance(self._data_path, str):
-                    value = value.get(self._data_path)
-                elif isinstance(value, list):
-                    if isinstance(self._data_path, int) and self._data_path < len(value):
-                        value = value[self._data_path]
-                    elif isinstance(self._data_path, str):
-                        # Handle lists of dicts with named fields
-                        value = [item.get(self._data_path) for item in value if isinstance(item, dict)]
-                        value = ', '.join(filter(None, value))  # Join non-None values into a string
-                else:
-                    _LOGGER.warning(f"Data path '{self._data_path}' not found for sensor '{self._name}'")
-
-            if isinstance(value, list) and len(value) > 0:
-                if all(isinstance(item, list) for item in value):
-                    value = ', '.join(map(str, [subitem for sublist in value for subitem in sublist]))
-                else:
-                    value = value[0]
-
-            # Convert final value to None if it’s still a dictionary (not displayable as state)
-            if isinstance(value, dict):
-                value = None
+            value = self._extract(data)
 
             # Update sensor state and availability
-            self._state = value if value is not None else None
+            self._state = value
             self._available = value is not None
-            _LOGGER.debug(f"Sensor '{self._name}' updated: State = {self._state}, Available = {self._available}")
 
 class DeviceCountSensor(BaseMiWiFiSensor):
     """Sensor that returns the number of connected devices from the devicelist endpoint."""
 
-    async def async_update(self):
-        data = await self._data_cache.get_data(self._endpoint)
-        _LOGGER.debug(f"Fetched data for DeviceCountSensor: {data}")
+    def _update_from_data(self, payloads):
+        data = payloads.get(self._endpoint) if payloads else None
 
         if data and isinstance(data.get(self._sensor_key), list):
             self._state = len(data.get(self._sensor_key))
@@ -269,3 +263,63 @@ class DeviceCountSensor(BaseMiWiFiSensor):
         else:
             self._state = None
             self._available = False
+
+class ClientSpeedSensor(BaseMiWiFiSensor):
+    """Sensor for the current up- or download speed of one client of the devicelist endpoint."""
+
+    def __init__(self, coordinator, mac, field, name, icon=None):
+        self._mac = mac
+        self._field = field
+        super().__init__(
+            coordinator, "devicelist", f"client.{mac}.{field}", name,
+            native_unit=UnitOfDataRate.BYTES_PER_SECOND, device_class=SensorDeviceClass.DATA_RATE,
+            icon=icon, state_class=SensorStateClass.MEASUREMENT,
+        )
+
+    @property
+    def entity_registry_enabled_default(self):
+        # Two sensors per client add up quickly on busy routers, so they are opt-in
+        return False
+
+    def _is_affected(self):
+        return self._mac in self.coordinator.device_diff
+
+    def _update_from_data(self, payloads):
+        info = self.coordinator.device_index.clients.get(self._mac)
+        self._state = getattr(info, self._field) if info else None
+        self._available = self._state is not None
+
+class SignalStatsSensor(BaseMiWiFiSensor):
+    """Sensor for the mean of a signal metric over the last window, with min, max and p5 as attributes."""
+
+    @property
+    def extra_state_attributes(self):
+        data = (self.coordinator.data or {}).get(self._endpoint) or {}
+        stats = data.get(self._sensor_key) or {}
+        return {key: stats.get(key) for key in ("min", "max", "p5", "samples")}
+
+    @callback
+    def _handle_coordinator_update(self):
+        if self._is_affected():
+            # The attributes can change while the mean stays the same
+            self._written = None
+        super()._handle_coordinator_update()
+
+class PollLatencySensor(BaseMiWiFiSensor):
+    """Sensor for the time the last refresh of all endpoints took."""
+
+    @property
+    def entity_category(self):
+        return EntityCategory.DIAGNOSTIC
+
+    @property
+    def entity_registry_enabled_default(self):
+        return False
+
+    def _is_affected(self):
+        return True
+
+    def _update_from_data(self, payloads):
+        duration = self.coordinator.last_refresh_duration
+        self._state = round(duration * 1000) if duration is not None else None
+        self._available = self._state is not None
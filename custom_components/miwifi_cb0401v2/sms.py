@@ -0,0 +1,34 @@
+"""Incremental processing of the router's SMS inbox."""
+
+def _message_id(message):
+    try:
+        return int(message.get("id"))
+    except (TypeError, ValueError):
+        return None
+
+class SmsInbox:
+    """Remembers the highest message ID seen, so that every message is reported only once."""
+
+    def __init__(self, last_id=None):
+        self.last_id = last_id  # Watermark, persisted between restarts
+
+    def new_messages(self, payload):
+        """Return the messages of a msgbox_list payload newer than the watermark, oldest first.
+
+        The watermark moves past them. On the very first call the current inbox only sets the
+        watermark, so an existing inbox does not turn into a flood of new-message events.
+        """
+        messages = []
+        for message in (payload or {}).get("list") or []:
+            if isinstance(message, dict):
+                message_id = _message_id(message)
+                if message_id is not None:
+                    messages.append((message_id, message))
+        newest = max((message_id for message_id, _ in messages), default=0)
+
+        if self.last_id is None:
+            self.last_id = newest
+            return []
+        new = sorted((item for item in messages if item[0] > self.last_id), key=lambda item: item[0])
+        self.last_id = max(self.last_id, newest)
+        return [message for _, message in new]
@@ -0,0 +1,80 @@
+"""Request statistics of a MiWiFiClient, shown in the diagnostics download."""
+
+# Upper bounds in seconds of the request latency histogram buckets, the last bucket is open-ended
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class EndpointStats:
+    """Counters and latency histogram of the requests to one API endpoint."""
+
+    __slots__ = (
+        "requests", "failures", "consecutive_failures", "bytes_received",
+        "latency_total", "last_latency", "parse_time_total", "histogram",
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.bytes_received = 0
+        self.latency_total = 0.0
+        self.last_latency = None
+        self.parse_time_total = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, latency, size, parse_time, ok=True):
+        """Count a request that got an answer; ok is False for error answers like an expired session."""
+        self.requests += 1
+        if ok:
+            self.consecutive_failures = 0
+        else:
+            self.record_failure()
+        self.bytes_received += size
+        self.latency_total += latency
+        self.last_latency = latency
+        self.parse_time_total += parse_time
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                break
+        else:
+            index = len(LATENCY_BUCKETS)
+        self.histogram[index] += 1
+
+    def record_failure(self):
+        """Count a failed request."""
+        self.failures += 1
+        self.consecutive_failures += 1
+
+    def as_dict(self):
+        answered = self.requests or 1
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "bytes_received": self.bytes_received,
+            "latency_avg_ms": round(self.latency_total / answered * 1000, 1),
+            "last_latency_ms": round(self.last_latency * 1000, 1) if self.last_latency is not None else None,
+            "parse_time_avg_ms": round(self.parse_time_total / answered * 1000, 3),
+            "latency_histogram_ms": {
+                **{f"<={bound * 1000:g}": count for bound, count in zip(LATENCY_BUCKETS, self.histogram)},
+                f">{LATENCY_BUCKETS[-1] * 1000:g}": self.histogram[-1],
+            },
+        }
+
+class ClientStats:
+    """Statistics of all requests a client sent to its router."""
+
+    def __init__(self):
+        self.endpoints = {}
+        self.relogins = 0
+
+    def endpoint(self, endpoint):
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        return stats
+
+    def as_dict(self):
+        return {
+            "relogins": self.relogins,
+            "endpoints": {endpoint: stats.as_dict() for endpoint, stats in self.endpoints.items()},
+        }
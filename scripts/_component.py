@@ -0,0 +1,18 @@
+"""Import the integration modules that don't need Home Assistant, e.g. api, cache and extract.
+
+The package __init__ only imports Home Assistant when an entry is set up, so the submodules
+import the normal way once the repository root is on sys.path.
+"""
+import importlib
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PACKAGE = "custom_components.miwifi_cb0401v2"
+COMPONENT_DIR = ROOT / "custom_components" / "miwifi_cb0401v2"
+
+def load(name):
+    """Import and return the submodule `name` of the integration."""
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    return importlib.import_module(f"{PACKAGE}.{name}")
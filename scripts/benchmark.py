@@ -0,0 +1,151 @@
+"""Benchmark the polling pipeline (client, cache, extraction) against the local mock router.
+
+    python scripts/benchmark.py --routers 5 --cycles 20 --clients 500 --latency 0.05
+
+Every cycle refreshes all endpoints of every router, then runs the value extraction of all
+sensors defined in sensor.py and the devicelist index update. Reports per-cycle latency,
+requests per cycle, CPU time per entity update and memory per router. The mock router runs in
+the same process, so latency and memory include its share. Use --json to keep the numbers for
+comparison between versions.
+"""
+import argparse
+import ast
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+
+from _component import COMPONENT_DIR, load
+from mock_router import MockRouter
+
+api = load("api")
+cache = load("cache")
+device_index = load("device_index")
+extract = load("extract")
+const = load("const")
+
+def sensor_definitions():
+    """(endpoint, sensor_key, data_path) of the sensors in sensor.py, read without importing it."""
+    tree = ast.parse((COMPONENT_DIR / "sensor.py").read_text())
+    definitions = []
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Call)
+            and getattr(node.func, "id", None) in ("BaseMiWiFiSensor", "DeviceCountSensor")
+            and len(node.args) >= 3
+            and all(isinstance(arg, ast.Constant) for arg in node.args[1:3])
+        ):
+            data_path = next((kw.value.value for kw in node.keywords if kw.arg == "data_path"), None)
+            definitions.append((node.args[1].value, node.args[2].value, data_path))
+    return definitions
+
+class Router:
+    """Client, cache and compiled sensors of one benchmarked router."""
+
+    def __init__(self, host, password, definitions):
+        self.client = api.MiWiFiClient(host, "admin", password, api.create_session())
+        # A zero TTL makes every cycle fetch every endpoint
+        self.cache = cache.DataCache(self.client, {endpoint: timedelta(0) for endpoint in const.ENDPOINTS},
+                                     max_concurrency=const.MAX_CONCURRENT_REQUESTS)
+        self.sensors = [(endpoint, extract.compile_extractor(key, data_path)) for endpoint, key, data_path in definitions]
+        self.index = device_index.DeviceIndex()
+
+    async def refresh(self):
+        start = time.perf_counter()
+        data = await self.cache.refresh()
+        return time.perf_counter() - start, data
+
+    def update_entities(self, data):
+        """What the entities do with a refresh: extract every sensor value and diff the clients."""
+        for endpoint, extractor in self.sensors:
+            payload = data.get(endpoint)
+            if payload:
+                extractor(payload)
+        devices = (data.get("devicelist") or {}).get("list")
+        if isinstance(devices, list):
+            self.index.update(devices)
+        return len(self.sensors) + len(self.index.clients)
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+async def run(args):
+    mock = MockRouter(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                      token_ttl=args.token_ttl, clients=args.clients)
+    port = await mock.start()
+    host = f"127.0.0.1:{port}"
+    definitions = sensor_definitions()
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    routers = [Router(host, mock.password, definitions) for _ in range(args.routers)]
+    await asyncio.gather(*(router.client.login() for router in routers))
+
+    cycle_latencies, router_latencies, requests, cpu_per_entity = [], [], [], []
+    try:
+        for _ in range(args.cycles):
+            requests_before = sum(mock.requests.values())
+            start = time.perf_counter()
+            results = await asyncio.gather(*(router.refresh() for router in routers), return_exceptions=True)
+            cycle_latencies.append(time.perf_counter() - start)
+            requests.append((sum(mock.requests.values()) - requests_before) / len(routers))
+
+            cpu_start = time.process_time()
+            entities = 0
+            for router, result in zip(routers, results):
+                if isinstance(result, BaseException):
+                    continue
+                latency, data = result
+                router_latencies.append(latency)
+                entities += router.update_entities(data)
+            if entities:
+                cpu_per_entity.append((time.process_time() - cpu_start) / entities)
+            await asyncio.sleep(args.interval)
+        memory_per_router = (tracemalloc.get_traced_memory()[0] - baseline) / len(routers)
+    finally:
+        tracemalloc.stop()
+        await asyncio.gather(*(router.client.close() for router in routers))
+        await mock.stop()
+
+    return {
+        "routers": args.routers,
+        "cycles": args.cycles,
+        "clients": args.clients,
+        "cycle_latency_ms": {"median": statistics.median(cycle_latencies) * 1000, "p95": percentile(cycle_latencies, 0.95) * 1000},
+        "router_latency_ms": {"median": statistics.median(router_latencies) * 1000, "p95": percentile(router_latencies, 0.95) * 1000} if router_latencies else None,
+        "requests_per_cycle": statistics.mean(requests),
+        "cpu_us_per_entity_update": statistics.mean(cpu_per_entity) * 1e6 if cpu_per_entity else None,
+        "memory_kib_per_router": memory_per_router / 1024,
+        "bytes_received": mock.bytes_sent,
+        "logins": mock.requests["xqsystem/login"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--routers", type=int, default=1)
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=0.0, help="seconds between cycles")
+    parser.add_argument("--clients", type=int, default=50, help="number of clients in misystem/devicelist")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the mock router adds to every request")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--token-ttl", type=float, default=None)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for key, value in results.items():
+        if isinstance(value, dict):
+            value = ", ".join(f"{name} {number:.1f}" for name, number in value.items())
+        elif isinstance(value, float):
+            value = f"{value:.1f}"
+        print(f"{key:28} {value}")
+
+if __name__ == "__main__":
+    main()
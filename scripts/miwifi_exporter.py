@@ -0,0 +1,8 @@
+"""Poll routers without Home Assistant, see custom_components/miwifi_cb0401v2/exporter.py.
+
+    python scripts/miwifi_exporter.py --password secret 192.168.31.1 --format prometheus --once
+"""
+from _component import load
+
+if __name__ == "__main__":
+    load("exporter").main()
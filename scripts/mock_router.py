@@ -0,0 +1,182 @@
+"""Local stand-in for the LuCI API of a Xiaomi CB0401V2, for benchmarks and manual testing.
+
+Serves xqsystem/login, xqsystem/init_info, xqdtcustom/cpe_detect, xqdtcustom/newstatus,
+misystem/devicelist, xqmobile/get_msgbox_count and xqmobile/get_msgbox_list over HTTPS with a self-signed certificate:
+
+    python scripts/mock_router.py --port 8443 --latency 0.05 --clients 500 --token-ttl 300
+
+Then add the integration with host 127.0.0.1:8443 and password admin.
+"""
+import argparse
+import asyncio
+import collections
+import random
+import secrets
+import ssl
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+class MockRouter:
+    """Fake router with configurable latency, errors, session expiry and devicelist size."""
+
+    def __init__(self, password="admin", latency=0.0, jitter=0.0, error_rate=0.0, token_ttl=None, clients=10, seed=None):
+        self.password = password
+        self.latency = latency  # seconds added to every request
+        self.jitter = jitter  # up to this many seconds more, random per request
+        self.error_rate = error_rate  # share of requests answered with HTTP 500
+        self.token_ttl = token_ttl  # seconds until a token expires, None for never
+        self.clients = clients  # number of entries in misystem/devicelist
+        self.requests = collections.Counter()  # requests per endpoint
+        self.bytes_sent = 0
+        self._tokens = {}  # token -> expiry (time.monotonic()) or None
+        self._random = random.Random(seed)
+        self._runner = None
+
+    def app(self):
+        app = web.Application(middlewares=[self._conditions])
+        app.router.add_post("/cgi-bin/luci/api/xqsystem/login", self._login)
+        app.router.add_get("/cgi-bin/luci/;stok={token}/api/{endpoint:.+}", self._api)
+        app.router.add_get("/cgi-bin/luci/web", self._login_page)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0, ssl_context=None):
+        """Start serving and return the port."""
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port, ssl_context=ssl_context or self_signed_context())
+        await site.start()
+        return self._runner.addresses[0][1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def expire_tokens(self):
+        """Invalidate all sessions, as a router reboot would."""
+        self._tokens.clear()
+
+    @web.middleware
+    async def _conditions(self, request, handler):
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + self._random.uniform(0, self.jitter))
+        if self.error_rate and self._random.random() < self.error_rate:
+            return web.Response(status=500, text="Internal Server Error")
+        response = await handler(request)
+        if response.body is not None:
+            self.bytes_sent += len(response.body)
+        return response
+
+    async def _login(self, request):
+        self.requests["xqsystem/login"] += 1
+        form = await request.post()
+        if form.get("password") != self.password:
+            return web.json_response({"code": 401, "msg": "Invalid password"})
+        token = secrets.token_hex(16)
+        self._tokens[token] = time.monotonic() + self.token_ttl if self.token_ttl else None
+        return web.json_response({"code": 0, "token": token, "url": f"/cgi-bin/luci/;stok={token}/web/home"})
+
+    async def _login_page(self, request):
+        return web.Response(text="<html><body>login</body></html>", content_type="text/html")
+
+    async def _api(self, request):
+        endpoint = request.match_info["endpoint"]
+        self.requests[endpoint] += 1
+        token = request.match_info["token"]
+        if token not in self._tokens:
+            raise web.HTTPFound("/cgi-bin/luci/web")
+        expiry = self._tokens[token]
+        if expiry is not None and time.monotonic() > expiry:
+            del self._tokens[token]
+            raise web.HTTPFound("/cgi-bin/luci/web")
+        payload = getattr(self, "_" + endpoint.replace("/", "_"), None)
+        if payload is None:
+            raise web.HTTPNotFound()
+        return web.json_response(payload())
+
+    def _xqsystem_init_info(self):
+        return {"code": 0, "romversion": "3.0.59", "hardware": "CB0401V2", "inited": 1}
+
+    def _xqdtcustom_cpe_detect(self):
+        r = self._random
+        return {
+            "code": 0,
+            "net": {
+                "info": {
+                    "cell_band": "B3", "cell_band_5g": "N78", "ci": "12345678", "datausage": 123456,
+                    "linktype": "5G NSA", "operator": "Mock Mobile", "freqband": "1800MHz",
+                    "rsrp": r.randint(-110, -80), "rsrp_5g": r.randint(-115, -85),
+                    "rsrq": r.randint(-15, -5), "rsrq_5g": r.randint(-15, -5),
+                    "snr": r.randint(0, 25), "snr_5g": r.randint(0, 25),
+                },
+                "ipv4info": {"ipv4": [{"ip": "10.64.1.23", "mask": "255.255.255.252"}], "dns": ["10.74.210.210", "10.74.210.211"]},
+                "ipv6info": {"ip6addr": [{"ip": "2a02:3030:1:2::1"}], "dns": ["2a02:3033::1", "2a02:3033::2"]},
+            },
+        }
+
+    def _xqdtcustom_newstatus(self):
+        return {
+            "code": 0,
+            "hardware": {"mac": "AA:BB:CC:00:00:01", "sn": "12345/A1B2C3", "version": "3.0.59", "imei": "861234567890123", "platform": "CB0401V2"},
+            "2g": {"ssid": "Mock-2.4G", "online_sta_count": self.clients // 2},
+            "5g": {"ssid": "Mock-5G", "online_sta_count": self.clients - self.clients // 2},
+            "count": {"all": self.clients, "online": self.clients},
+        }
+
+    def _misystem_devicelist(self):
+        r = self._random
+        devices = []
+        for i in range(self.clients):
+            mac = f"02:00:00:{i >> 16 & 0xFF:02X}:{i >> 8 & 0xFF:02X}:{i & 0xFF:02X}"
+            devices.append({
+                "mac": mac, "oname": f"client-{i}", "name": f"Client {i}", "isap": 0, "parent": "", "push": 0,
+                "type": i % 3, "times": 0, "online": str(r.randint(60, 86400)),
+                "authority": {"wan": 1, "pridisk": 0, "admin": 1, "lan": 0},
+                "ip": [{"ip": f"192.168.{31 + (i >> 8)}.{i & 0xFF}", "active": 1, "online": "3600",
+                        "upspeed": str(r.choice((0, 0, r.randint(0, 500000)))), "downspeed": str(r.choice((0, 0, r.randint(0, 5000000))))}],
+            })
+        return {"code": 0, "mac": "AA:BB:CC:00:00:01", "list": devices}
+
+    def _xqmobile_get_msgbox_count(self):
+        return {"code": 0, "count": 3}
+
+    def _xqmobile_get_msgbox_list(self):
+        return {"code": 0, "list": [
+            {"id": i, "phone": "+490000000000", "content": f"Mock message {i}", "date": "2024-01-01 12:00:00"}
+            for i in range(1, 4)
+        ]}
+
+def self_signed_context():
+    """Server SSL context with a throwaway self-signed certificate, made with the openssl CLI."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = Path(tmp, "cert.pem"), Path(tmp, "key.pem")
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+             "-subj", "/CN=miwifi-mock", "-keyout", str(key), "-out", str(cert)],
+            check=True, capture_output=True,
+        )
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(cert, key)
+    return context
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many random seconds more")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    parser.add_argument("--token-ttl", type=float, default=None, help="seconds until a session token expires")
+    parser.add_argument("--clients", type=int, default=10, help="number of clients in misystem/devicelist")
+    args = parser.parse_args()
+
+    router = MockRouter(args.password, args.latency, args.jitter, args.error_rate, args.token_ttl, args.clients)
+    web.run_app(router.app(), host=args.host, port=args.port, ssl_context=self_signed_context(), access_log=None)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""The integration's HA-free modules and the mock router import from the repository checkout."""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "scripts")]
@@ -0,0 +1,163 @@
+"""Tests of the HA-free helpers: backoff, limiter, derived values, SMS inbox, device index, planner, TTLs."""
+import asyncio
+from datetime import timedelta
+
+from custom_components.miwifi_cb0401v2 import _endpoint_ttls
+from custom_components.miwifi_cb0401v2.cache import Backoff
+from custom_components.miwifi_cb0401v2.const import REFRESH_TRIGGERS
+from custom_components.miwifi_cb0401v2.derived import CounterRate, SampleWindow
+from custom_components.miwifi_cb0401v2.device_index import DeviceIndex
+from custom_components.miwifi_cb0401v2.fleet import FairLimiter, Fleet
+from custom_components.miwifi_cb0401v2.planner import RefreshPlanner
+from custom_components.miwifi_cb0401v2.sms import SmsInbox
+
+def test_backoff_grows_with_jitter_up_to_the_maximum():
+    backoff = Backoff(timedelta(seconds=30), timedelta(minutes=10))
+    delays = [backoff.failure() for _ in range(8)]
+    assert 30 <= delays[0] <= 60
+    assert 60 <= delays[1] <= 120
+    assert all(300 <= delay <= 600 for delay in delays[5:])
+    assert backoff.failures == 8
+    assert backoff.success() == 30
+    assert backoff.failures == 0
+
+def test_fair_limiter_serves_routers_round_robin():
+    async def main():
+        limiter = FairLimiter(2)
+        order = []
+
+        async def request(key):
+            async with limiter.slot(key):
+                order.append(key)
+                await asyncio.sleep(0.01)
+
+        # Router a queues six requests before b and c queue two each
+        await asyncio.gather(*(request("a") for _ in range(6)), *(request(key) for key in "bcbc"))
+        return order, limiter.in_use
+
+    order, in_use = asyncio.run(main())
+    assert in_use == 0
+    # After the two requests that got a slot right away, the routers take turns
+    assert "".join(order[:8]) == "aaabcabc"
+
+def test_fair_limiter_restriction_and_cancellation():
+    async def main():
+        limiter = FairLimiter(3)
+        limiter.restrict("down", 1)
+        running = {"down": 0, "max_down": 0}
+
+        async def request(key):
+            async with limiter.slot(key):
+                if key == "down":
+                    running["down"] += 1
+                    running["max_down"] = max(running["max_down"], running["down"])
+                await asyncio.sleep(0.01)
+                if key == "down":
+                    running["down"] -= 1
+
+        tasks = [asyncio.ensure_future(request("down")) for _ in range(3)]
+        tasks += [asyncio.ensure_future(request("up")) for _ in range(3)]
+        await asyncio.sleep(0)
+        tasks[1].cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return running["max_down"], limiter.in_use
+
+    assert asyncio.run(main()) == (1, 0)
+
+def test_fleet_phases_are_spread_and_positions_reused():
+    fleet = Fleet(8)
+    for key in "abcd":
+        fleet.join(key)
+    phases = sorted(fleet.phase(key, 30) for key in "abcd")
+    assert phases[0] == 0
+    assert min(later - earlier for earlier, later in zip(phases, phases[1:])) > 3
+    phase_b = fleet.phase("b", 30)
+    fleet.leave("b")
+    fleet.join("e")
+    assert fleet.phase("e", 30) == phase_b
+
+def test_counter_rate_survives_counter_resets():
+    rate = CounterRate(window=3600, maxlen=10)
+    assert rate.rate(300) is None
+    for timestamp, value in ((0, 100), (30, 101), (60, 103), (90, 2), (120, 5)):
+        rate.add(timestamp, value)
+    # 100 -> 103, reset, 0 -> 5: eight MB in total, never negative
+    assert rate.increase() == 8
+    assert rate.rate(300) == 8 / 120
+    assert rate.rate(30) == 3 / 30
+
+def test_counter_rate_drops_samples_outside_the_window():
+    rate = CounterRate(window=60, maxlen=10)
+    for step in range(10):
+        rate.add(step * 30, step)
+    assert rate.increase() == 2
+
+def test_sample_window_wraps_around():
+    window = SampleWindow(4)
+    assert window.stats() is None
+    for value in (-90, -100, -95, -80, -70, -60):
+        window.add(value)
+    assert window.stats() == {"min": -95, "mean": -76.2, "max": -60, "p5": -95, "samples": 4}
+    window.clear()
+    assert len(window) == 0
+
+def test_sms_inbox_reports_each_new_message_once():
+    inbox = SmsInbox()
+    # The first inbox only sets the watermark
+    assert inbox.new_messages({"list": [{"id": "2"}, {"id": 1}]}) == []
+    assert inbox.last_id == 2
+    assert inbox.new_messages({"list": [{"id": "4"}, {"id": 3}, {"id": 1}]}) == [{"id": 3}, {"id": "4"}]
+    assert inbox.new_messages({"list": [{"id": "4"}, {"id": 3}]}) == []
+    assert inbox.new_messages({"code": 0}) == []
+    assert inbox.last_id == 4
+
+def test_sms_inbox_starting_empty_reports_the_first_message():
+    inbox = SmsInbox()
+    assert inbox.new_messages({"list": []}) == []
+    assert inbox.new_messages({"list": [{"id": 1}, {"text": "no id"}]}) == [{"id": 1}]
+
+def test_device_index_diff():
+    index = DeviceIndex()
+    device = lambda mac, speed: {"mac": mac, "name": mac, "ip": [{"ip": "192.168.31.2", "downspeed": speed}]}
+    diff = index.update([device("aa:aa", "1"), device("bb:bb", "2"), {"name": "no mac"}])
+    assert diff.joined == {"AA:AA", "BB:BB"} and not diff.left and not diff.changed
+    diff = index.update([device("aa:aa", "1"), device("cc:cc", "3")])
+    assert diff.joined == {"CC:CC"} and diff.left == {"BB:BB"} and not diff.changed
+    diff = index.update([device("aa:aa", "5"), device("cc:cc", "3")])
+    assert not diff.joined and not diff.left and diff.changed == {"AA:AA"}
+    assert "AA:AA" in diff and not index.update([device("aa:aa", "5"), device("cc:cc", "3")])
+    assert index.clients["AA:AA"].downspeed == 5
+
+def test_refresh_planner_triggers_on_indicator_changes():
+    planner = RefreshPlanner((
+        ("newstatus", ("2g.online_sta_count", "5g.online_sta_count"), "devicelist"),
+        ("cpe_detect", ("net.ipv4info.ipv4",), "newstatus"),
+    ))
+    newstatus = lambda count: {"2g": {"online_sta_count": count}, "5g": {"online_sta_count": 1}}
+    cpe_detect = lambda ip: {"net": {"ipv4info": {"ipv4": [{"ip": ip}]}}}
+    # The first payloads only set the baseline
+    assert planner.stale_endpoints({"newstatus": newstatus(1), "cpe_detect": cpe_detect("10.0.0.1")}) == set()
+    assert planner.stale_endpoints({"newstatus": newstatus(1), "cpe_detect": cpe_detect("10.0.0.1")}) == set()
+    assert planner.stale_endpoints({"newstatus": newstatus(2), "cpe_detect": cpe_detect("10.0.0.1")}) == {"devicelist"}
+    assert planner.stale_endpoints({"newstatus": newstatus(2), "cpe_detect": cpe_detect("10.0.0.2")}) == {"newstatus"}
+    # A failed endpoint keeps the previous indicators
+    assert planner.stale_endpoints({"newstatus": None, "cpe_detect": cpe_detect("10.0.0.2")}) == set()
+    assert planner.stale_endpoints({"newstatus": newstatus(2), "cpe_detect": cpe_detect("10.0.0.2")}) == set()
+
+def test_devicelist_keeps_its_trigger_source_polled():
+    # newstatus' own sensor group is disabled
+    ttls = _endpoint_ttls({"sensor_groups": ["devicelist", "general"]})
+    assert ttls == {"cpe_detect": timedelta(seconds=30), "newstatus": timedelta(minutes=1), "devicelist": timedelta(minutes=10)}
+    # ... or its interval is set longer than the devicelist can wait for
+    assert _endpoint_ttls({"newstatus_interval": 3600})["newstatus"] == timedelta(minutes=1)
+    assert _endpoint_ttls({"newstatus_interval": 20})["newstatus"] == timedelta(seconds=20)
+    # Without the devicelist, newstatus isn't needed as trigger source
+    assert "newstatus" not in _endpoint_ttls({"sensor_groups": ["general"]})
+    assert _endpoint_ttls({"sensor_groups": ["newstatus"], "newstatus_interval": 3600})["newstatus"] == timedelta(hours=1)
+
+    # With these TTLs the planner sees every change of the station counts
+    planner = RefreshPlanner(REFRESH_TRIGGERS)
+    newstatus = lambda count: {"2g": {"online_sta_count": count}, "5g": {"online_sta_count": 0}, "count": count}
+    data = {endpoint: None for endpoint in ttls}
+    assert planner.stale_endpoints({**data, "newstatus": newstatus(1)}) == set()
+    assert planner.stale_endpoints({**data, "newstatus": newstatus(2)}) == {"devicelist"}
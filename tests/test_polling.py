@@ -0,0 +1,144 @@
+"""Tests of the client and the cache against the mock router."""
+import asyncio
+import functools
+import socket
+from datetime import timedelta
+
+import pytest
+
+from custom_components.miwifi_cb0401v2.api import MiWiFiClient, MiWiFiConnectionError, create_session
+from custom_components.miwifi_cb0401v2.cache import DataCache
+from mock_router import MockRouter, self_signed_context
+
+ssl_context = functools.lru_cache(maxsize=1)(self_signed_context)
+
+def run_with_router(test, **options):
+    """Run test(router, client) against a fresh mock router."""
+    async def main():
+        router = MockRouter(**options)
+        port = await router.start(ssl_context=ssl_context())
+        client = MiWiFiClient(f"127.0.0.1:{port}", "admin", router.password, create_session(timeout=2))
+        try:
+            return await test(router, client)
+        finally:
+            await client.close()
+            await router.stop()
+    return asyncio.run(main())
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def test_login_fetches_device_information():
+    async def test(router, client):
+        assert await client.login()
+        assert client.mac_address == "AA:BB:CC:00:00:01"
+        assert client.firmware_version == "3.0.59"
+        assert "newstatus" in client.initial_payloads
+    run_with_router(test)
+
+def test_requests_during_the_login_share_it():
+    async def test(router, client):
+        router.latency = 0.05
+        # The background login races the coordinator's first tick or a signal sample
+        logged_in, status = await asyncio.gather(client.login(), client.cpe_detect())
+        assert logged_in and status["code"] == 0
+        assert router.requests["xqsystem/login"] == 1
+        assert client.stats.relogins == 0
+    run_with_router(test)
+
+def test_login_after_a_request_logged_in_reuses_its_token():
+    async def test(router, client):
+        assert (await client.cpe_detect())["code"] == 0
+        assert await client.login()
+        assert client.mac_address == "AA:BB:CC:00:00:01"
+        assert router.requests["xqsystem/login"] == 1
+    run_with_router(test)
+
+def test_expired_session_is_renewed_once_for_concurrent_requests():
+    async def test(router, client):
+        await client.login()
+        router.expire_tokens()
+        results = await asyncio.gather(client.cpe_detect(), client.newstatus(), client.devicelist(), client.msgbox_count())
+        assert all(result["code"] == 0 for result in results)
+        assert router.requests["xqsystem/login"] == 2
+        assert client.stats.relogins == 1
+    run_with_router(test)
+
+def test_only_the_invalid_token_code_means_an_expired_session():
+    async def test(router, client):
+        await client.login()
+        router._xqmobile_get_msgbox_count = lambda: {"code": 1523, "msg": "no SIM card"}
+        assert await client.msgbox_count() is None
+        assert await client.msgbox_count() is None
+        assert client.stats.relogins == 0
+        assert client.stats.endpoint("xqmobile/get_msgbox_count").failures == 2
+
+        router._xqdtcustom_cpe_detect = lambda: {"code": 401, "msg": "Invalid token"}
+        assert await client.cpe_detect() is None
+        assert client.stats.relogins == 1
+    run_with_router(test)
+
+def test_unreachable_router_raises_and_logs_in_once():
+    async def main():
+        client = MiWiFiClient(f"127.0.0.1:{closed_port()}", "admin", "admin", create_session(timeout=2))
+        try:
+            assert not await client.login()
+            results = await asyncio.gather(client.cpe_detect(), client.newstatus(), client.devicelist(), return_exceptions=True)
+            assert all(isinstance(result, MiWiFiConnectionError) for result in results)
+            assert client.stats.relogins == 1
+        finally:
+            await client.close()
+    asyncio.run(main())
+
+def test_cache_coalesces_concurrent_reads():
+    async def test(router, client):
+        await client.login()
+        cache = DataCache(client, {"cpe_detect": timedelta(0)})
+        router.latency = 0.05
+        results = await asyncio.gather(*(cache.get_data("cpe_detect") for _ in range(5)))
+        assert all(result is results[0] for result in results)
+        assert router.requests["xqdtcustom/cpe_detect"] == 1
+        assert cache.misses["cpe_detect"] == 1 and cache.coalesced["cpe_detect"] == 4
+    run_with_router(test)
+
+def test_cache_serves_fresh_endpoints_and_refetches_invalidated_ones():
+    async def test(router, client):
+        await client.login()
+        cache = DataCache(client, {"cpe_detect": timedelta(0), "devicelist": timedelta(minutes=10)})
+        await cache.refresh()
+        await cache.refresh()
+        assert router.requests["xqdtcustom/cpe_detect"] == 2
+        assert router.requests["misystem/devicelist"] == 1
+        cache.invalidate("devicelist")
+        await cache.refresh()
+        assert router.requests["misystem/devicelist"] == 2
+    run_with_router(test)
+
+def test_cache_hits_dont_hide_an_outage():
+    async def test(router, client):
+        await client.login()
+        cache = DataCache(client, {"cpe_detect": timedelta(0), "newstatus": timedelta(minutes=5), "devicelist": timedelta(minutes=10)})
+        await cache.refresh()
+        await router.stop()
+        with pytest.raises(MiWiFiConnectionError):
+            await cache.refresh()
+        # The payloads stay available as fallback
+        assert cache.fetched_at("devicelist") is not None
+    run_with_router(test)
+
+def test_cache_keeps_previous_payload_when_some_requests_fail():
+    async def test(router, client):
+        await client.login()
+        cache = DataCache(client, {"cpe_detect": timedelta(0), "newstatus": timedelta(0)})
+        first = await cache.refresh()
+
+        async def broken():
+            raise MiWiFiConnectionError("timeout")
+
+        client.newstatus = broken
+        data = await cache.refresh()
+        assert data["newstatus"] is first["newstatus"]
+        assert data["cpe_detect"] is not first["cpe_detect"]
+    run_with_router(test)